@@ -9,9 +9,13 @@ This module is intentionally small and dependency-free.
 """
 from __future__ import annotations
 
+import atexit
 import json
 import os
-from datetime import datetime
+import queue
+import re
+import threading
+import time
 from pathlib import Path
 from typing import Any, Dict, Iterable, Optional
 
@@ -19,25 +23,66 @@ import logging
 
 from .utils import chmod_restringido, harden_permissions
 
+try:  # POSIX: candado advisory para escrituras que O_APPEND no garantiza atómicas
+    import fcntl as _fcntl
+    import select as _select
+
+    _ATOMIC_MAX = int(getattr(_select, "PIPE_BUF", 512))
+except ImportError:  # pragma: no cover - Windows
+    _fcntl = None
+    _ATOMIC_MAX = 0
+
 _log = logging.getLogger("procesador.audit")
 
-CONTROL_CHARS = {chr(i) for i in range(0, 32)} - {"\t"}
+# fdatasync evita sincronizar metadatos que no cambian; no existe en Windows/macOS.
+_datasync = getattr(os, "fdatasync", os.fsync)
+
+# Tabla de traducción: caracteres de control (excepto TAB) -> espacio.
+_CONTROL_TRANS = str.maketrans({i: " " for i in range(0, 32) if i != 9})
 
 def _sanitize_text(s: str, max_len: int = 500) -> str:
-    s = (s or "").replace("\r", " ").replace("\n", " ")
-    s = "".join((" " if ch in CONTROL_CHARS else ch) for ch in s)
+    s = (s or "").translate(_CONTROL_TRANS)
     s = " ".join(s.split())
     if len(s) > max_len:
         s = s[: max_len - 3] + "..."
     return s
 
 
+# Cualquier cosa que _sanitize_text alteraría: controles, espacios no simples,
+# espacios dobles o en los extremos.
+_SUSPECT_RE = re.compile(r"[\x00-\x1f]|[^\S ]|  |^ | $")
+
+_ENCODE = json.JSONEncoder(ensure_ascii=False).encode
+
+
+def _is_clean_text(s: str, max_len: int) -> bool:
+    return len(s) <= max_len and _SUSPECT_RE.search(s) is None
+
+
+def _is_clean(rec: Dict[str, Any]) -> bool:
+    """True si sanitize_record devolvería el registro sin cambios."""
+    for k, v in rec.items():
+        if not (isinstance(k, str) and _is_clean_text(k, 80)):
+            return False
+        if v is None or isinstance(v, (int, float, bool)):
+            continue
+        if not (isinstance(v, str) and _is_clean_text(v, 1200)):
+            return False
+    return True
+
+
+def _encode_record(rec: Dict[str, Any]) -> str:
+    rec = rec or {}
+    return _ENCODE(rec if _is_clean(rec) else sanitize_record(rec))
+
+
 def sanitize_record(rec: Dict[str, Any]) -> Dict[str, Any]:
     out: Dict[str, Any] = {}
     for k, v in (rec or {}).items():
-        kk = _sanitize_text(str(k), max_len=80)
+        # campos ya limpios se copian tal cual (solo se reescriben los sospechosos)
+        kk = k if isinstance(k, str) and _is_clean_text(k, 80) else _sanitize_text(str(k), max_len=80)
         if isinstance(v, str):
-            out[kk] = _sanitize_text(v, max_len=1200)
+            out[kk] = v if _is_clean_text(v, 1200) else _sanitize_text(v, max_len=1200)
         elif v is None or isinstance(v, (int, float, bool)):
             out[kk] = v
         else:
@@ -54,32 +99,251 @@ def ensure_dir_secure(d: Path) -> None:
         _log.debug("No se pudo endurecer permisos de %s", d, exc_info=True)
 
 
+class _AuditWriter:
+    """Descriptores de archivo cacheados por ruta de auditoría.
+
+    Cada archivo se abre con ``O_APPEND`` y modo 0600 (sin chmod posterior por
+    escritura); los descriptores se cierran al rotar y al salir. El tamaño se
+    lleva en memoria (un ``fstat`` al abrir + lo escrito), así que no hay
+    ``stat`` por registro. Solo cuando el contador cruza ``rotate_max_bytes`` o
+    pasaron ``_RECHECK_S`` segundos desde la última verificación se hace un
+    ``stat`` de la ruta: si el inodo/dispositivo ya no es el del archivo
+    abierto (otro proceso lo rotó, movió o borró) se reabre la ruta viva; si
+    coincide, se toma su tamaño real (incluye lo escrito por otros procesos).
+    """
+
+    _FLAGS = (
+        os.O_WRONLY
+        | os.O_APPEND
+        | os.O_CREAT
+        | getattr(os, "O_CLOEXEC", 0)
+        | getattr(os, "O_BINARY", 0)
+    )
+
+    # intervalo máximo sin verificar que la ruta siga siendo el archivo abierto
+    _RECHECK_S = 2.0
+
+    def __init__(self) -> None:
+        self._fds: Dict[Path, int] = {}
+        self._ids: Dict[Path, tuple[int, int]] = {}
+        self._sizes: Dict[Path, int] = {}
+        self._checked: Dict[Path, float] = {}
+        self._lock = threading.Lock()
+
+    def _fd(self, path: Path) -> int:
+        fd = self._fds.get(path)
+        if fd is not None:
+            return fd
+        ensure_dir_secure(path.parent)
+        fd = os.open(str(path), self._FLAGS, 0o600)
+        # archivo previo con permisos laxos: endurecer una vez al abrir
+        harden_permissions(path)
+        st = os.fstat(fd)
+        self._fds[path] = fd
+        self._ids[path] = (st.st_ino, st.st_dev)
+        self._sizes[path] = st.st_size
+        self._checked[path] = time.monotonic()
+        return fd
+
+    def _recheck(self, path: Path) -> int:
+        """Compara la ruta con el archivo abierto; reabre si ya no es el mismo."""
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            st = None
+        if st is not None and (st.st_ino, st.st_dev) == self._ids[path]:
+            self._sizes[path] = st.st_size
+            self._checked[path] = time.monotonic()
+            return self._fds[path]
+        # la ruta ya no es el archivo abierto (rotación/movimiento externo)
+        self._close(path)
+        return self._fd(path)
+
+    def _close(self, path: Path) -> None:
+        self._sizes.pop(path, None)
+        self._ids.pop(path, None)
+        self._checked.pop(path, None)
+        fd = self._fds.pop(path, None)
+        if fd is not None:
+            os.close(fd)
+
+    def _rotate(self, path: Path) -> None:
+        """Rota el archivo (best-effort); el siguiente _fd() abre uno nuevo."""
+        try:
+            ts = time.strftime("%Y%m%d_%H%M%S")
+            rotated = path.with_name(path.stem + f"_{ts}" + path.suffix)
+            n = 1
+            while rotated.exists():  # dos rotaciones en el mismo segundo
+                rotated = path.with_name(path.stem + f"_{ts}_{n}" + path.suffix)
+                n += 1
+            self._close(path)
+            path.rename(rotated)
+            harden_permissions(rotated)
+        except Exception:
+            _log.debug("No se pudo rotar archivo de auditoría %s", path, exc_info=True)
+
+    def write(self, path: Path, data: bytes, rotate_max_bytes: int = 0, sync: bool = False) -> None:
+        with self._lock:
+            fd = self._fd(path)
+            limite = int(rotate_max_bytes or 0)
+            if (limite and self._sizes[path] > limite) or (
+                time.monotonic() - self._checked[path] >= self._RECHECK_S
+            ):
+                fd = self._recheck(path)
+            if limite and self._sizes[path] > limite:
+                self._rotate(path)
+                fd = self._fd(path)
+            locked = False
+            if _fcntl is not None and len(data) > _ATOMIC_MAX:
+                # lotes grandes: evita intercalar con otra corrida concurrente
+                try:
+                    _fcntl.flock(fd, _fcntl.LOCK_EX)
+                    locked = True
+                except OSError:
+                    pass
+            try:
+                view = memoryview(data)
+                while view:
+                    view = view[os.write(fd, view):]
+                if sync:
+                    # un solo sync por lote (no por registro)
+                    _datasync(fd)
+            finally:
+                if locked:
+                    _fcntl.flock(fd, _fcntl.LOCK_UN)
+            self._sizes[path] += len(data)
+
+    def close_all(self) -> None:
+        with self._lock:
+            for path in list(self._fds):
+                try:
+                    self._close(path)
+                except OSError:
+                    pass
+
+
+class _BackgroundWriter:
+    """Cola + hilo daemon que agrupa registros pendientes y escribe por lotes.
+
+    El productor solo encola (copia superficial del registro); el hilo
+    serializa y junta lo pendiente para la misma ruta en un único write().
+    ``flush()`` bloquea hasta que todo lo encolado quedó en disco y relanza el
+    primer error de escritura ocurrido en el hilo (un lote fallido no se pierde
+    en silencio).
+    """
+
+    _MAX_BATCH = 1024
+
+    def __init__(self, writer: _AuditWriter) -> None:
+        self._writer = writer
+        self._queue: "queue.Queue[tuple[Path, int, list[Dict[str, Any]]]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        # primer error del hilo desde el último flush(); flush() lo relanza
+        self._error: Optional[BaseException] = None
+
+    def put(self, path: Path, records: list[Dict[str, Any]], rotate_max_bytes: int) -> None:
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    t = threading.Thread(target=self._drain, name="procesador-audit", daemon=True)
+                    t.start()
+                    self._thread = t
+        self._queue.put((path, int(rotate_max_bytes or 0), records))
+
+    def _drain(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self._MAX_BATCH:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._write_batch(batch)
+            except Exception as exc:
+                _log.warning("No se pudo escribir lote de auditoría", exc_info=True)
+                if self._error is None:
+                    self._error = exc
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _write_batch(self, batch: list[tuple[Path, int, list[Dict[str, Any]]]]) -> None:
+        # agrupa entradas consecutivas de la misma ruta (conserva el orden global)
+        i = 0
+        while i < len(batch):
+            path, rotate, _ = batch[i]
+            lines: list[str] = []
+            while i < len(batch) and batch[i][0] == path:
+                lines.extend(_encode_record(r) + "\n" for r in batch[i][2])
+                i += 1
+            if lines:
+                self._writer.write(path, "".join(lines).encode("utf-8"), rotate)
+
+    def flush(self) -> None:
+        if self._thread is not None:
+            self._queue.join()
+        err, self._error = self._error, None
+        if err is not None:
+            raise err
+
+
+_WRITER = _AuditWriter()
+_BACKGROUND = _BackgroundWriter(_WRITER)
+atexit.register(_WRITER.close_all)
+# atexit es LIFO: vaciar la cola antes de cerrar descriptores
+atexit.register(_BACKGROUND.flush)
+
+
+def close_all() -> None:
+    """Cierra los descriptores de auditoría abiertos (también se llama al salir).
+
+    Relanza el error de escritura en segundo plano si lo hubo (tras cerrar).
+    """
+    try:
+        _BACKGROUND.flush()
+    finally:
+        _WRITER.close_all()
+
+
+def flush_audit() -> None:
+    """Espera a que se escriban los registros encolados con ``background=True``.
+
+    Si algún lote falló en el hilo, relanza la primera excepción.
+    """
+    _BACKGROUND.flush()
+
+
+def append_bytes(path: Path, data: bytes, rotate_max_bytes: int = 0, sync: bool = False) -> Path:
+    """Agrega bytes ya serializados (líneas completas) con una sola escritura.
+
+    Usa el mismo descriptor cacheado y la misma rotación que :func:`log_change`.
+    """
+    path = Path(path)
+    _WRITER.write(path, data, rotate_max_bytes, sync)
+    return path
+
+
 def log_change(
     *,
     audit_dir: Path,
     record: Dict[str, Any],
     filename: str = "auditoria_cambios.jsonl",
     rotate_max_bytes: int = 0,
+    background: bool = False,
+    sync: bool = False,
 ) -> Path:
-    """Append a sanitized record to JSONL audit file."""
-    audit_dir = Path(audit_dir)
-    ensure_dir_secure(audit_dir)
-    path = audit_dir / filename
-
-    # rotate best-effort
-    try:
-        if rotate_max_bytes and path.exists() and path.stat().st_size > int(rotate_max_bytes):
-            ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-            rotated = path.with_name(path.stem + f"_{ts}" + path.suffix)
-            path.rename(rotated)
-            harden_permissions(rotated)
-    except Exception:
-        _log.debug("No se pudo rotar archivo de auditoría %s", path, exc_info=True)
+    """Append a sanitized record to JSONL audit file (rotating best-effort).
 
-    rec = sanitize_record(record)
-    with open(path, "a", encoding="utf-8") as f:
-        f.write(json.dumps(rec, ensure_ascii=False) + "\n")
-    harden_permissions(path)
+    Con ``background=True`` solo se encola; ver :func:`flush_audit`.
+    ``sync=True`` hace fdatasync tras escribir (se ignora en modo background).
+    """
+    path = Path(audit_dir) / filename
+    if background:
+        _BACKGROUND.put(path, [dict(record or {})], rotate_max_bytes)
+        return path
+    _WRITER.write(path, (_encode_record(record) + "\n").encode("utf-8"), rotate_max_bytes, sync)
     return path
 
 
@@ -89,65 +353,63 @@ def log_many(
     records: Iterable[Dict[str, Any]],
     filename: str = "auditoria_cambios.jsonl",
     rotate_max_bytes: int = 0,
+    background: bool = False,
+    sync: bool = False,
 ) -> Optional[Path]:
-    last: Optional[Path] = None
-    for r in records:
-        last = log_change(
-            audit_dir=audit_dir,
-            record=r,
-            filename=filename,
-            rotate_max_bytes=rotate_max_bytes,
-        )
-    return last
+    """Append many sanitized records with a single write.
+
+    La rotación se evalúa una sola vez antes del lote (un lote nunca se parte
+    entre dos archivos). Con ``background=True`` solo se encola. ``sync=True``
+    hace un único fdatasync por lote.
+    """
+    if background:
+        recs = [dict(r or {}) for r in records]
+        if not recs:
+            return None
+        path = Path(audit_dir) / filename
+        _BACKGROUND.put(path, recs, rotate_max_bytes)
+        return path
+
+    lines = [_encode_record(r) + "\n" for r in records]
+    if not lines:
+        return None
+
+    path = Path(audit_dir) / filename
+    _WRITER.write(path, "".join(lines).encode("utf-8"), rotate_max_bytes, sync)
+    return path
 
 
 def make_sample_entries() -> list[dict[str, Any]]:
-    now = datetime.now().isoformat(timespec="seconds")
+    now = time.strftime("%Y-%m-%dT%H:%M:%S")
+    rows = [
+        ("003", "EDIT", "Salida a comer", "09:29", "09:30",
+         "Ajuste por diferencia de 1 minuto (validado con supervisor)."),
+        ("003", "INSERT", "Regreso de cenar", "", "21:35",
+         "Se agregó regreso a cenar (registro faltante en export)."),
+        ("NOMBRE::JUAN PEREZ", "DELETE", "Entrada", "08:01", "",
+         "Registro duplicado, se conserva el primero."),
+    ]
     return [
         {
             "run_id": "sample_run_001",
-            "emp_id": "003",
-            "fecha": "2026-01-29",
-            "usuario": "RRHH",
-            "ts": now,
-            "accion": "EDIT",
-            "campo": "Salida a comer",
-            "antes": "09:29",
-            "despues": "09:30",
-            "motivo": "Ajuste por diferencia de 1 minuto (validado con supervisor).",
-        },
-        {
-            "run_id": "sample_run_001",
-            "emp_id": "003",
-            "fecha": "2026-01-29",
-            "usuario": "RRHH",
-            "ts": now,
-            "accion": "INSERT",
-            "campo": "Regreso de cenar",
-            "antes": "",
-            "despues": "21:35",
-            "motivo": "Se agregó regreso a cenar (registro faltante en export).",
-        },
-        {
-            "run_id": "sample_run_001",
-            "emp_id": "NOMBRE::JUAN PEREZ",
+            "emp_id": emp_id,
             "fecha": "2026-01-29",
             "usuario": "RRHH",
             "ts": now,
-            "accion": "DELETE",
-            "campo": "Entrada",
-            "antes": "08:01",
-            "despues": "",
-            "motivo": "Registro duplicado, se conserva el primero.",
-        },
+            "accion": accion,
+            "campo": campo,
+            "antes": antes,
+            "despues": despues,
+            "motivo": motivo,
+        }
+        for emp_id, accion, campo, antes, despues, motivo in rows
     ]
 
 
 def write_sample_jsonl(path: Path) -> Path:
     path = Path(path)
     path.parent.mkdir(parents=True, exist_ok=True)
-    with open(path, "w", encoding="utf-8") as f:
-        for rec in make_sample_entries():
-            f.write(json.dumps(sanitize_record(rec), ensure_ascii=False) + "\n")
+    blob = "".join(_encode_record(rec) + "\n" for rec in make_sample_entries())
+    path.write_text(blob, encoding="utf-8")
     harden_permissions(path)
     return path
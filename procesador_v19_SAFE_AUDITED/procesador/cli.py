@@ -11,18 +11,53 @@ Compatibilidad:
 from __future__ import annotations
 
 import argparse
+import importlib
 import json
+import os
 import datetime
 from pathlib import Path
 
-from .config import cargar_config
-from .corrections import verificar_auditoria_bundle
 from .logger import setup_logging
-from .pipeline import procesar_archivo
-from .merge_inputs import collect_inputs, merge_inputs
+
+# Dependencias pesadas (pandas/openpyxl vía pipeline, corrections, etc.) se
+# importan al usarse: `--help` o `verify-audit` no cargan lo que no necesitan.
+_LAZY = {
+    "cargar_config": ".config",
+    "verificar_auditoria_bundle": ".corrections",
+    "procesar_archivo": ".pipeline",
+    "collect_inputs": ".merge_inputs",
+    "merge_inputs": ".merge_inputs",
+}
+
+
+def __getattr__(name: str):
+    try:
+        mod = _LAZY[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+    value = getattr(importlib.import_module(mod, __package__), name)
+    globals()[name] = value
+    return value
+
+
+def _lazy(name: str):
+    """Resuelve un nombre de _LAZY respetando overrides (p.ej. monkeypatch en tests)."""
+    value = globals().get(name)
+    return value if value is not None else __getattr__(name)
+
+
+_PARSER_CACHE: argparse.ArgumentParser | None = None
 
 
 def build_parser() -> argparse.ArgumentParser:
+    """Parser del CLI (se construye una vez por proceso y se reutiliza)."""
+    global _PARSER_CACHE
+    if _PARSER_CACHE is None:
+        _PARSER_CACHE = _build_parser_impl()
+    return _PARSER_CACHE
+
+
+def _build_parser_impl() -> argparse.ArgumentParser:
     p = argparse.ArgumentParser(description="Procesador de asistencias (v19 modular).")
     sub = p.add_subparsers(dest="cmd")
 
@@ -93,6 +128,7 @@ def _validate_file_path(path: Path, description: str) -> bool:
 
 def _cmd_process(args: argparse.Namespace) -> int:
     setup_logging(level=str(args.log_level).upper())
+    procesar_archivo = _lazy("procesar_archivo")
 
     # Compat: en modo legacy algunos atributos pueden no existir.
     audit_user = str(getattr(args, "audit_user", "") or "")
@@ -110,7 +146,7 @@ def _cmd_process(args: argparse.Namespace) -> int:
     # Determinar input: archivo directo o consolidado desde directorio
     if str(getattr(args, "input_dir", "")).strip():
         in_dir = Path(str(args.input_dir))
-        files = collect_inputs(
+        files = _lazy("collect_inputs")(
             in_dir,
             pattern=str(getattr(args, "pattern", "*.xlsx")),
             recursive=bool(getattr(args, "recursive", False)),
@@ -126,7 +162,7 @@ def _cmd_process(args: argparse.Namespace) -> int:
             stamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
             merged_path = in_dir / f"_MERGED_{stamp}.xlsx"
 
-        rep = merge_inputs(files, merged_path, dedupe=True, sort=True, keep_extra_cols=False)
+        rep = _lazy("merge_inputs")(files, merged_path, dedupe=True, sort=True, keep_extra_cols=False)
         in_path = rep.output_path
     else:
         in_path = Path(args.input_path)
@@ -157,12 +193,12 @@ def _cmd_process(args: argparse.Namespace) -> int:
 def _cmd_merge(args: argparse.Namespace) -> int:
     setup_logging(level=str(args.log_level).upper())
     in_dir = Path(args.input_dir)
-    files = collect_inputs(in_dir, pattern=str(args.pattern), recursive=bool(args.recursive))
+    files = _lazy("collect_inputs")(in_dir, pattern=str(args.pattern), recursive=bool(args.recursive))
     if not files:
         print(f"ERROR: no se encontraron archivos en {in_dir} con patrón {args.pattern}")
         return 2
     out_path = Path(args.output_path)
-    rep = merge_inputs(
+    rep = _lazy("merge_inputs")(
         files,
         out_path,
         dedupe=not bool(args.no_dedupe),
@@ -213,19 +249,19 @@ def _cmd_verify_audit(args: argparse.Namespace) -> int:
         ):
             print("ERROR: bundle inválido en latest.json")
             return 2
-        audit_dir_resolved = audit_dir.resolve()
-        bundle = (audit_dir / bundle_rel).resolve()
-        try:
-            bundle.relative_to(audit_dir_resolved)
-        except ValueError:
+        # Contención léxica (sin syscalls): bundle_rel ya no es absoluto ni tiene "..".
+        root = os.path.normpath(str(audit_dir))
+        candidate = os.path.normpath(os.path.join(root, str(bundle_rel)))
+        if not candidate.startswith(root + os.sep):
             print("ERROR: bundle inválido en latest.json")
             return 2
+        bundle = Path(candidate)
         if not _validate_file_path(bundle, "bundle"):
             return 2
 
     script_dir = Path(__file__).resolve().parent
-    cfg = cargar_config(script_dir)
-    ok = verificar_auditoria_bundle(bundle, script_dir=script_dir, cfg=cfg)
+    cfg = _lazy("cargar_config")(script_dir)
+    ok = _lazy("verificar_auditoria_bundle")(bundle, script_dir=script_dir, cfg=cfg)
     if ok:
         print("OK: firma válida")
         return 0
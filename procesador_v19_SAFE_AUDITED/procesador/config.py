@@ -4,14 +4,41 @@ from __future__ import annotations
 
 import logging
 
+import hashlib
 import json
+import os
+import re
+import sys
+import tempfile
 from .logger import log_exception
 from dataclasses import dataclass, field
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Optional
 from .utils import backup_file, chmod_restringido
 from .validaciones import validate_non_negative_int, validate_weekday
 
+try:  # dependencia opcional: serialización nativa más rápida
+    import orjson  # type: ignore
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+@dataclass(frozen=True, slots=True)
+class EmpleadoRec:
+    """Vista de solo lectura de un empleado (grupo, IDGRUPO, estatus y meta juntos).
+
+    Los dicts de AppConfig siguen siendo la fuente de verdad (se editan y se
+    serializan); esto solo evita varias búsquedas por empleado al leer.
+    """
+
+    grupo: str = ""
+    idgrupo: str = ""
+    activo: bool = True
+    fecha_alta: str = ""
+    fecha_baja: str = ""
+    meta: Dict[str, str] = field(default_factory=dict)
+
 
 @dataclass
 class AppConfig:
@@ -52,6 +79,7 @@ class AppConfig:
     audit_key_dir: str = ""  # override absoluto/relativo (opcional)
     audit_signing_enabled: bool = True
     audit_rotate_max_bytes: int = 5_000_000
+    audit_fsync: bool = False  # fdatasync tras cada escritura de auditoría (durable, más lento)
 
     # CLI / ejecución
     no_interactive_default: bool = False
@@ -110,19 +138,113 @@ class AppConfig:
     def prefijo_de_grupo(self, grupo: str) -> str:
         return (self.grupos_meta.get(grupo, {}) or {}).get("prefijo", grupo)
 
+    def empleados(self) -> Dict[str, EmpleadoRec]:
+        """Snapshot emp_id -> EmpleadoRec con la unión de los mapeos por empleado.
+
+        Se construye en una sola pasada; volver a llamarlo tras modificar los dicts.
+        """
+        a_grupo = self.empleado_a_grupo or {}
+        a_idgrupo = self.empleado_a_idgrupo or {}
+        status = self.empleado_status or {}
+        meta = self.empleado_meta or {}
+        out: Dict[str, EmpleadoRec] = {}
+        for emp in {**a_grupo, **a_idgrupo, **status, **meta}:
+            st = status.get(emp) or {}
+            out[sys.intern(str(emp))] = EmpleadoRec(
+                grupo=str(a_grupo.get(emp, "") or ""),
+                idgrupo=str(a_idgrupo.get(emp, "") or ""),
+                activo=bool(st.get("activo", True)),
+                fecha_alta=str(st.get("fecha_alta", "") or ""),
+                fecha_baja=str(st.get("fecha_baja", "") or ""),
+                meta=meta.get(emp) or {},
+            )
+        return out
+
+    def column_width(self, name: str) -> Optional[float]:
+        """Ancho configurado para una columna (exacto o por patrón); None si no aplica."""
+        w = (self.column_widths or {}).get(name)
+        if w is not None:
+            return float(w)
+        for item in (self.column_width_patterns or []):
+            try:
+                rx = _compile_width_pattern(str(item.get("pattern", "")))
+                if rx is not None and rx.search(name):
+                    return float(item.get("width", 0) or 0)
+            except Exception:
+                continue
+        return None
+
+
+@lru_cache(maxsize=256)
+def _compile_width_pattern(pattern: str) -> Optional["re.Pattern[str]"]:
+    """Compila (una vez) un patrón de column_width_patterns; None si vacío o inválido."""
+    if not pattern:
+        return None
+    try:
+        return re.compile(pattern)
+    except re.error:
+        return None
+
 
 
 def _config_path(script_dir: Path) -> Path:
     return script_dir / "mapa_grupos.json"
 
 
+# Campos de la sección "audit" de mapa_grupos.json (mismo nombre que en AppConfig,
+# en el orden en que se serializan).
+_AUDIT_FIELDS = (
+    "app_name",
+    "audit_dir_name",
+    "audit_index_filename",
+    "audit_changes_filename",
+    "audit_key_filename",
+    "audit_key_storage",
+    "audit_key_dir",
+    "audit_signing_enabled",
+    "audit_rotate_max_bytes",
+    "audit_fsync",
+    "no_interactive_default",
+)
+
+# sha256 del último texto leído/escrito por ruta: si guardar_config produce el
+# mismo texto no hace falta releer el archivo para saber que no cambió.
+_LAST_WRITTEN: Dict[Path, bytes] = {}
+
+
+def _digest(raw: bytes) -> bytes:
+    return hashlib.sha256(raw.strip()).digest()
+
+
+def _loads(raw: bytes) -> dict:
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw.decode("utf-8"))
+
+
+# Encoder del fallback stdlib construido una vez (indent/ensure_ascii fijos).
+_JSON_ENCODER = json.JSONEncoder(ensure_ascii=False, indent=2)
+
+
+def _dumps(data: dict) -> bytes:
+    """JSON UTF-8 con indent=2 (mismo texto con orjson o con json)."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(data, option=orjson.OPT_INDENT_2)
+        except TypeError:  # orjson.JSONEncodeError: claves no-str, ints enormes, etc.
+            pass
+    return _JSON_ENCODER.encode(data).encode("utf-8")
+
+
 def cargar_config(script_dir: Path) -> AppConfig:
     path = _config_path(script_dir)
     if not path.exists():
         cfg = AppConfig()
         guardar_config(script_dir, cfg)
         return cfg
-    data = json.loads(path.read_text(encoding="utf-8"))
+    raw = path.read_bytes()
+    _LAST_WRITTEN[path] = _digest(raw)
+    data = _loads(raw)
     cfg = AppConfig()
     cfg.grupos_orden = data.get("grupos_orden", cfg.grupos_orden)
     cfg.grupos_meta = data.get("grupos_meta", cfg.grupos_meta)
@@ -142,16 +264,14 @@ def cargar_config(script_dir: Path) -> AppConfig:
     cfg.dayfirst = bool(reglas.get("dayfirst", cfg.dayfirst))
 
     audit = data.get("audit", {}) or {}
-    cfg.app_name = str(audit.get("app_name", cfg.app_name) or cfg.app_name)
-    cfg.audit_dir_name = str(audit.get("audit_dir_name", cfg.audit_dir_name) or cfg.audit_dir_name)
-    cfg.audit_index_filename = str(audit.get("audit_index_filename", cfg.audit_index_filename) or cfg.audit_index_filename)
-    cfg.audit_changes_filename = str(audit.get("audit_changes_filename", cfg.audit_changes_filename) or cfg.audit_changes_filename)
-    cfg.audit_key_filename = str(audit.get("audit_key_filename", cfg.audit_key_filename) or cfg.audit_key_filename)
-    cfg.audit_key_storage = str(audit.get("audit_key_storage", cfg.audit_key_storage) or cfg.audit_key_storage)
-    cfg.audit_key_dir = str(audit.get("audit_key_dir", cfg.audit_key_dir) or cfg.audit_key_dir)
-    cfg.audit_signing_enabled = bool(audit.get("audit_signing_enabled", cfg.audit_signing_enabled))
-    cfg.audit_rotate_max_bytes = int(audit.get("audit_rotate_max_bytes", cfg.audit_rotate_max_bytes) or cfg.audit_rotate_max_bytes)
-    cfg.no_interactive_default = bool(audit.get("no_interactive_default", cfg.no_interactive_default))
+    for name in _AUDIT_FIELDS:
+        cur = getattr(cfg, name)
+        val = audit.get(name, cur)
+        if isinstance(cur, bool):
+            setattr(cfg, name, bool(val))
+        else:
+            # str/int: valores vacíos caen al default
+            setattr(cfg, name, type(cur)(val or cur))
 
     # Prefijos/códigos de nómina globales (lista de strings), opcional.
     try:
@@ -165,6 +285,9 @@ def cargar_config(script_dir: Path) -> AppConfig:
     cfg.column_widths = excel.get("column_widths", cfg.column_widths) or cfg.column_widths
     # Patrones (regex) para columnas dinámicas
     cfg.column_width_patterns = excel.get("column_width_patterns", cfg.column_width_patterns) or cfg.column_width_patterns
+    for item in cfg.column_width_patterns:
+        if isinstance(item, dict):
+            _compile_width_pattern(str(item.get("pattern", "")))
 
     # Validate numeric config bounds
     try:
@@ -188,12 +311,37 @@ def cargar_config(script_dir: Path) -> AppConfig:
 
 
 
+def _write_atomic(path: Path, raw: bytes) -> None:
+    """Escribe a un temporal en el mismo directorio, fsync y os.replace.
+
+    Un corte a mitad de escritura nunca deja mapa_grupos.json truncado.
+    """
+    fd, tmp = tempfile.mkstemp(prefix=path.name + ".", suffix=".tmp", dir=str(path.parent))
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(raw)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
 def guardar_config(script_dir: Path, cfg: AppConfig) -> None:
     """Guarda configuración en mapa_grupos.json.
 
     Reglas:
     - No sobrescribe si el contenido serializado no cambió (evita backups/spam).
+      La detección es por contenido (digest), no por una bandera "dirty" en
+      AppConfig: los llamadores mutan los mapeos anidados en sitio
+      (cfg.empleado_a_grupo[emp] = g, cfg.empleado_status[emp]["activo"] = ...)
+      y una bandera de nivel superior no vería esos cambios.
     - Si cambia y existe archivo previo, crea backup timestamped.
+    - Escritura atómica (temporal + fsync + os.replace).
     - Endurece permisos best-effort (0600 en POSIX).
 
     Nota: este archivo es la fuente de verdad para:
@@ -223,18 +371,7 @@ def guardar_config(script_dir: Path, cfg: AppConfig) -> None:
             "week_start_dow": cfg.week_start_dow,
             "dayfirst": cfg.dayfirst,
         },
-        "audit": {
-            "app_name": cfg.app_name,
-            "audit_dir_name": cfg.audit_dir_name,
-            "audit_index_filename": cfg.audit_index_filename,
-            "audit_changes_filename": cfg.audit_changes_filename,
-            "audit_key_filename": cfg.audit_key_filename,
-            "audit_key_storage": cfg.audit_key_storage,
-            "audit_key_dir": cfg.audit_key_dir,
-            "audit_signing_enabled": cfg.audit_signing_enabled,
-            "audit_rotate_max_bytes": cfg.audit_rotate_max_bytes,
-            "no_interactive_default": cfg.no_interactive_default,
-        },
+        "audit": {name: getattr(cfg, name) for name in _AUDIT_FIELDS},
         "excel": {
             "idgrupo_split_by_group": bool(getattr(cfg, "excel_idgrupo_split_by_group", True)),
             "column_widths": cfg.column_widths,
@@ -242,13 +379,17 @@ def guardar_config(script_dir: Path, cfg: AppConfig) -> None:
         },
     }
 
-    new_text = json.dumps(data, ensure_ascii=False, indent=2)
+    new_raw = _dumps(data)
+    new_digest = _digest(new_raw)
 
     # Si no hay cambios, NO tocar el archivo (ni backups)
+    if _LAST_WRITTEN.get(path) == new_digest and path.exists():
+        return
     try:
         if path.exists():
-            old = path.read_text(encoding="utf-8")
-            if old.strip() == new_text.strip():
+            old = path.read_bytes().replace(b"\r\n", b"\n")
+            if old.strip() == new_raw.strip():
+                _LAST_WRITTEN[path] = new_digest
                 return
     except Exception:
         pass
@@ -259,7 +400,8 @@ def guardar_config(script_dir: Path, cfg: AppConfig) -> None:
     except Exception:
         log_exception("Fallo best-effort en backup de config", level=logging.WARNING)
 
-    path.write_text(new_text, encoding="utf-8")
+    _write_atomic(path, new_raw)
+    _LAST_WRITTEN[path] = new_digest
 
     # Endurecer permisos del archivo
     try:
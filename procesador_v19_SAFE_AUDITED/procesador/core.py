@@ -3,13 +3,17 @@
 from __future__ import annotations
 
 import logging
-from datetime import datetime, timedelta, time
-from typing import Dict, List, Optional, Tuple
+from bisect import bisect_left
+from datetime import time
+from operator import itemgetter
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
 
 from .config import AppConfig
 
 _log = logging.getLogger("procesador.core")
 
+_first = itemgetter(0)
+
 __all__ = [
     "add_minutes",
     "round_minutes",
@@ -17,13 +21,27 @@ __all__ = [
     "normalize_registro_times",
     "map_eventos",
     "calcular_trabajado",
+    "calcular_trabajado_batch",
+    "MergedIntervals",
 ]
 
 def add_minutes(t: Optional[time], minutes: int) -> Optional[time]:
     if t is None:
         return None
-    dt = datetime(2000,1,1,t.hour,t.minute) + timedelta(minutes=minutes)
-    return time(dt.hour, dt.minute)
+    total = (t.hour * 60 + t.minute + minutes) % 1440
+    return time(total // 60, total % 60)
+
+def _round_up(v: int, step: int) -> int:
+    return -(-v // step) * step
+
+def _round_down(v: int, step: int) -> int:
+    return v - v % step
+
+def _round_nearest(v: int, step: int) -> int:
+    # empate (v - lo == hi - v) -> hacia arriba, como la versión original
+    return (v // step + ((v % step) * 2 >= step)) * step
+
+_ROUND_FNS = {"up": _round_up, "down": _round_down}
 
 def round_minutes(value_min: int, step: int, mode: str) -> int:
     """
@@ -33,26 +51,16 @@ def round_minutes(value_min: int, step: int, mode: str) -> int:
       - 'down'    (hacia abajo)
       - 'nearest' (al más cercano)
     """
-    if step <= 1:
-        return max(0, value_min)
     v = max(0, value_min)
-    if mode == "up":
-        return ((v + step - 1) // step) * step
-    if mode == "down":
-        return (v // step) * step
-    # nearest
-    lo = (v // step) * step
-    hi = lo + step
-    return hi if (v - lo) >= (hi - v) else lo
+    if step <= 1:
+        return v
+    return _ROUND_FNS.get(mode, _round_nearest)(v, step)
 def minutos_entre(t1: Optional[time], t2: Optional[time]) -> int:
     if t1 is None or t2 is None:
         return 0
-    dt1 = datetime(2000, 1, 1, t1.hour, t1.minute)
-    dt2 = datetime(2000, 1, 1, t2.hour, t2.minute)
-    if dt2 < dt1:
-        # cruce de medianoche (muy raro para checadas del mismo día, pero por seguridad)
-        dt2 += timedelta(days=1)
-    return int((dt2 - dt1).total_seconds() // 60)
+    d = (t2.hour * 60 + t2.minute) - (t1.hour * 60 + t1.minute)
+    # cruce de medianoche (muy raro para checadas del mismo día, pero por seguridad)
+    return d + 1440 if d < 0 else d
 
 def normalize_registro_times(times: List[time]) -> Tuple[List[time], bool]:
     """Normaliza y ordena checadas para cálculos consistentes.
@@ -62,22 +70,32 @@ def normalize_registro_times(times: List[time]) -> Tuple[List[time], bool]:
     """
     if not times or len(times) < 2:
         return times, False
-    mins = [t.hour * 60 + t.minute for t in times]
-    entry_min = mins[0]
-    has_smaller = any(m < entry_min for m in mins[1:])
-    span = max(mins) - min(mins)
+    # Una sola pasada: minutos, mínimo/máximo y si hay horas menores que la entrada.
+    t0 = times[0]
+    entry_min = min_m = max_m = t0.hour * 60 + t0.minute
+    has_smaller = False
+    adjusted = [(entry_min, 0, t0)]
+    for idx in range(1, len(times)):
+        t = times[idx]
+        m = t.hour * 60 + t.minute
+        if m < entry_min:
+            has_smaller = True
+            if m < min_m:
+                min_m = m
+        elif m > max_m:
+            max_m = m
+        adjusted.append((m, idx, t))
     # Heurística de cruce de medianoche:
     # - Entrada tarde (>=18:00) y hay horas menores -> probable cruce
     # - O hay horas menores y el rango del día es muy amplio -> probable cruce
-    wrap_likely = (entry_min >= 18 * 60 and has_smaller) or (has_smaller and span > 12 * 60)
-    adjusted = []
-    for idx, (t, m) in enumerate(zip(times, mins)):
-        adj = m + (1440 if (wrap_likely and m < entry_min) else 0)
-        adjusted.append((adj, idx, t))
+    wrap_likely = has_smaller and (entry_min >= 18 * 60 or max_m - min_m > 12 * 60)
+    if wrap_likely:
+        adjusted = [(m + 1440 if m < entry_min else m, idx, t) for m, idx, t in adjusted]
     ordered = sorted(adjusted, key=lambda x: (x[0], x[1]))
     out = [t for _adj, _idx, t in ordered]
-
-    return out, (out != times)
+    # El orden es estable (desempate por índice): hubo reordenamiento si algún índice se movió.
+    reordered = any(idx != pos for pos, (_adj, idx, _t) in enumerate(ordered))
+    return out, reordered
 # ---------------------------
 # Correcciones manuales (opcional)
 # ---------------------------
@@ -97,26 +115,21 @@ def map_eventos(times: List[time]) -> Dict[str, Optional[time]]:
     Si hay más de 6 checadas, se usan únicamente las 4 intermedias más tempranas
     y se conserva la última como Salida.
     """
-    labels = ["Entrada", "Salida a comer", "Regreso de comer", "Salida a cenar", "Regreso de cenar", "Salida"]
-    out = {k: None for k in labels}
+    # Dict construido en un solo literal (mismo orden de llaves que antes); se mantiene
+    # dict y no namedtuple porque pipeline aplica correcciones y marcas por asignación.
     n = len(times)
-    out["_extra_registros"] = max(0, n - 6)
-    if n == 0:
-        return out
-    if n == 1:
-        out["Entrada"] = times[0]
-        return out
-    # Siempre: primera = Entrada, última = Salida
-    out["Entrada"] = times[0]
-    out["Salida"] = times[-1]
-    # Intermedias
-    middle = times[1:-1]
-    middle_labels = ["Salida a comer", "Regreso de comer", "Salida a cenar", "Regreso de cenar"]
-    for lab, t in zip(middle_labels, middle[:4]):
-        out[lab] = t
-    return out
+    k = n - 2  # intermedias disponibles: times[1..k] (solo se usan las 4 primeras)
+    return {
+        "Entrada": times[0] if n else None,
+        "Salida a comer": times[1] if k > 0 else None,
+        "Regreso de comer": times[2] if k > 1 else None,
+        "Salida a cenar": times[3] if k > 2 else None,
+        "Regreso de cenar": times[4] if k > 3 else None,
+        "Salida": times[-1] if n > 1 else None,
+        "_extra_registros": n - 6 if n > 6 else 0,
+    }
 
-def calcular_trabajado(eventos: Dict[str, Optional[time]], cfg: AppConfig, no_laborado_extra: Optional[List[Tuple[Optional[time], Optional[time], str]]] = None) -> Tuple[int, int, int, int, int, int, int, int]:
+def calcular_trabajado(eventos: Dict[str, Optional[time]], cfg: AppConfig, no_laborado_extra: Optional[Union[List[Tuple[Optional[time], Optional[time], str]], "MergedIntervals"]] = None) -> Tuple[int, int, int, int, int, int, int, int]:
     """
     Devuelve (minutos_trabajados, minutos_extra_redondeados).
     Enfoque (robusto y alineado a RRHH):
@@ -131,167 +144,321 @@ def calcular_trabajado(eventos: Dict[str, Optional[time]], cfg: AppConfig, no_la
          - Salidas extraordinarias (por inconveniente):
              * Intervalos extra (inicio, fin). Si falta fin y hay salida final -> asume fin = Salida.
              * Se descuenta duración real (sin tope).
+             * Puede pasarse un MergedIntervals ya fusionado en lugar de la lista.
       3) Umbral de extra: a partir de cfg.umbral_extra_min (8:00) y redondeo según cfg.
     Nota: si falta Entrada o Salida, devuelve (0,0).
     """
-    ent = eventos.get("Entrada")
-    sal = eventos.get("Salida")
+    get = eventos.get
+    ent = get("Entrada")
+    sal = get("Salida")
     if not ent or not sal:
         return 0, 0, 0, 0, 0, 0, 0, 0
-    total = minutos_entre(ent, sal)
+    # Todo el cálculo trabaja en minutos enteros: cada hora se convierte una sola vez.
+    sal_m = sal.hour * 60 + sal.minute
+    # Comida/cena: minuto del día o -1 si no hay checada (conversión en línea, sin llamadas).
+    t = get("Salida a comer")
+    sal_com_m = -1 if t is None else t.hour * 60 + t.minute
+    t = get("Regreso de comer")
+    reg_com_m = -1 if t is None else t.hour * 60 + t.minute
+    t = get("Salida a cenar")
+    sal_cen_m = -1 if t is None else t.hour * 60 + t.minute
+    t = get("Regreso de cenar")
+    reg_cen_m = -1 if t is None else t.hour * 60 + t.minute
+    # Sin NoLaborado (caso común) o con todos los inicios vacíos, el núcleo recibe
+    # una lista vacía y se salta por completo recorte/orden/fusión de intervalos.
+    ent_m = ent.hour * 60 + ent.minute
+    nl: Union[Sequence[Tuple[int, int]], MergedIntervals] = ()
+    if isinstance(no_laborado_extra, MergedIntervals):
+        # Reutilizable solo si se construyó para esta misma Entrada/Salida (p.ej. tras correcciones)
+        if (no_laborado_extra.ent_m, no_laborado_extra.sal_m) == (ent_m, sal_m):
+            nl = no_laborado_extra
+        else:
+            nl = [(ini_m, sal_m if fin_m < 0 else fin_m) for ini_m, fin_m in no_laborado_extra.pares]
+    elif no_laborado_extra:
+        # si falta fin, se asume fin = Salida
+        nl = [
+            (ini.hour * 60 + ini.minute, sal_m if fin is None else fin.hour * 60 + fin.minute)
+            for ini, fin, _nota in no_laborado_extra
+            if ini is not None
+        ]
+    return _calcular_core(
+        ent_m,
+        sal_m,
+        sal_com_m,
+        reg_com_m,
+        sal_cen_m,
+        reg_cen_m,
+        nl,
+        *_cfg_scalars(cfg),
+    )
+
+
+def _cfg_scalars(cfg: AppConfig) -> Tuple[int, int, int, int, Optional[Callable[[int, int], int]]]:
+    """Parámetros de cfg que usa _calcular_core: (umbral_comida, tope_comida, umbral_extra, round_step, round_fn).
+
+    El modo de redondeo se resuelve aquí a una función especializada (o None si no hay
+    redondeo), para no comparar cadenas en cada día calculado.
+    """
+    # AppConfig define todos estos campos con default: lectura directa, sin getattr.
+    step = cfg.redondeo_extra_step_min
+    modo = cfg.redondeo_extra_modo
+    round_step = 1
+    round_fn = None
+    if step and step > 1 and modo != "none":
+        round_step = int(step)
+        round_fn = _ROUND_FNS.get(modo, _round_nearest)
+    return (
+        int(cfg.umbral_comida_media_hora_min),
+        cfg.tope_descuento_comida_min,
+        cfg.umbral_extra_min,
+        round_step,
+        round_fn,
+    )
+
+
+def calcular_trabajado_batch(
+    ent_m: Sequence[int],
+    sal_m: Sequence[int],
+    mid_m: Sequence[Sequence[int]],
+    nl_offsets: Sequence[int],
+    nl_starts: Sequence[int],
+    nl_ends: Sequence[int],
+    cfg: AppConfig,
+) -> List[Tuple[int, int, int, int, int, int, int, int]]:
+    """
+    Versión por lotes de calcular_trabajado sobre minutos del día ya convertidos.
+
+    - ent_m / sal_m: Entrada y Salida de cada día (-1 = sin checada -> fila en ceros).
+    - mid_m: por día (Salida a comer, Regreso de comer, Salida a cenar, Regreso de cenar), -1 = sin checada.
+    - nl_offsets (N+1), nl_starts, nl_ends: intervalos NoLaborado de todos los días en formato CSR;
+      los del día i son starts/ends[nl_offsets[i]:nl_offsets[i+1]] (fin faltante ya resuelto a Salida).
+    Devuelve una tupla de 8 valores por día, igual que calcular_trabajado.
+    """
+    params = _cfg_scalars(cfg)
+    zeros = (0, 0, 0, 0, 0, 0, 0, 0)
+    out: List[Tuple[int, int, int, int, int, int, int, int]] = []
+    for i in range(len(ent_m)):
+        e, s = ent_m[i], sal_m[i]
+        if e < 0 or s < 0:
+            out.append(zeros)
+            continue
+        a, b = nl_offsets[i], nl_offsets[i + 1]
+        nl = list(zip(nl_starts[a:b], nl_ends[a:b]))
+        m = mid_m[i]
+        out.append(_calcular_core(e, s, m[0], m[1], m[2], m[3], nl, *params))
+    return out
+
+
+# Helpers de línea de tiempo relativa a la jornada (soporta cruce de medianoche):
+# en turnos nocturnos, minutos menores que Entrada se consideran del día siguiente.
+def _shift_window(a: int, b: int, ent_m: int, crosses: bool) -> Tuple[int, int]:
+    """Ubica el intervalo (a, b) en minutos de jornada; si b queda antes que a, b es del día siguiente."""
+    if crosses:
+        if a < ent_m:
+            a += 1440
+        if b < ent_m:
+            b += 1440
+    return a, (b + 1440 if b < a else b)
+
+def _overlap_min(a1: int, a2: int, b1: int, b2: int) -> int:
+    """Minutos de solape entre intervalos ya ubicados en la línea temporal de la jornada."""
+    s = max(a1, b1)
+    e = min(a2, b2)
+    return e - s if e > s else 0
+
+def _clip_to_shift(ini_m: int, fin_m: int, ent_m: int, crosses: bool, shift_ini: int, shift_fin: int) -> Optional[Tuple[int, int, int]]:
+    """Recorta un intervalo (ini, fin) a la ventana [Entrada, Salida] en la línea temporal de la jornada.
+    Devuelve (ini_recortado, fin_recortado, minutos_ignorados_fuera_de_jornada) o None si queda todo fuera."""
+    a0, a1 = _shift_window(ini_m, fin_m, ent_m, crosses)
+    i0 = max(a0, shift_ini)
+    i1 = min(a1, shift_fin)
+    if i1 <= i0:
+        return None
+    return i0, i1, max(0, (a1 - a0) - (i1 - i0))
+
+
+class MergedIntervals:
+    """
+    Intervalos NoLaborado de una jornada, recortados y fusionados conforme se agregan.
+
+    Pensado para capturas incrementales (un intervalo a la vez): cada ``add`` ubica el
+    intervalo con bisect y lo fusiona con sus vecinos, de modo que calcular_trabajado
+    ya no recorta/ordena/fusiona. Los contadores equivalen a los de la ruta con lista:
+    ``solape_interno`` (minutos encimados entre intervalos) e ``ignorados`` (fuera de jornada).
+    """
+
+    __slots__ = ("ent_m", "sal_m", "_crosses", "_shift_fin", "starts", "ends", "pares", "solape_interno", "ignorados")
+
+    def __init__(self, entrada: time, salida: time) -> None:
+        self.ent_m = entrada.hour * 60 + entrada.minute
+        self.sal_m = salida.hour * 60 + salida.minute
+        self._crosses = self.sal_m < self.ent_m
+        self._shift_fin = self.sal_m + (1440 if self._crosses else 0)
+        self.starts: List[int] = []
+        self.ends: List[int] = []
+        self.pares: List[Tuple[int, int]] = []  # capturados tal cual, fin -1 = sin fin (para recalcular si cambia la jornada)
+        self.solape_interno = 0
+        self.ignorados = 0
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def add(self, ini: Optional[time], fin: Optional[time]) -> None:
+        """Agrega (ini, fin); sin inicio se ignora y sin fin se asume fin = Salida."""
+        if ini is None:
+            return
+        ini_m = ini.hour * 60 + ini.minute
+        self.pares.append((ini_m, -1 if fin is None else fin.hour * 60 + fin.minute))
+        fin_m = self.sal_m if fin is None else fin.hour * 60 + fin.minute
+        clipped = _clip_to_shift(ini_m, fin_m, self.ent_m, self._crosses, self.ent_m, self._shift_fin)
+        if clipped is None:
+            self.ignorados += (fin_m - ini_m) % 1440
+            return
+        a, b, ign = clipped
+        self.ignorados += ign
+        starts, ends = self.starts, self.ends
+        i = bisect_left(starts, a)
+        if i and ends[i - 1] >= a:
+            i -= 1  # se encima o toca al bloque anterior
+        j = i
+        lo, hi = a, b
+        while j < len(starts) and starts[j] <= hi:
+            self.solape_interno += _overlap_min(a, b, starts[j], ends[j])
+            if starts[j] < lo:
+                lo = starts[j]
+            if ends[j] > hi:
+                hi = ends[j]
+            j += 1
+        starts[i:j] = [lo]
+        ends[i:j] = [hi]
+
+
+def _calcular_core(
+    ent_m: int,
+    sal_m: int,
+    sal_com_m: int,
+    reg_com_m: int,
+    sal_cen_m: int,
+    reg_cen_m: int,
+    nl: Union[Sequence[Tuple[int, int]], "MergedIntervals"],
+    umbral_comida: int,
+    tope_comida: int,
+    umbral_extra: int,
+    round_step: int,
+    round_fn: Optional[Callable[[int, int], int]],
+) -> Tuple[int, int, int, int, int, int, int, int]:
+    """Núcleo de calcular_trabajado solo con enteros (minuto del día; -1 = sin checada).
+
+    ``nl`` son los intervalos NoLaborado (ini, fin) ya sin faltantes, o un
+    MergedIntervals de la misma jornada. No usa
+    objetos Python más allá de tuplas/listas de int: candidato directo a JIT.
+    """
+    crosses_midnight = sal_m < ent_m  # si la salida es "menor" que la entrada, cruza al día siguiente
+    total = sal_m - ent_m + (1440 if crosses_midnight else 0)
     # --- Comida (regla: si <= umbral, descuenta solo media hora; si excede, descuenta completo)
-    sal_com = eventos.get("Salida a comer")
-    reg_com = eventos.get("Regreso de comer")
     comida_ded = 0
-    comida_fin_ventana = None  # fin de ventana descontada (para solapes con NoLaborado)
-    if sal_com and (reg_com or sal):
-        fin_real = reg_com if reg_com is not None else sal
-        if fin_real:
-            dur_real = minutos_entre(sal_com, fin_real)
-            umbral = int(getattr(cfg, "umbral_comida_media_hora_min", 60))
-            if dur_real <= umbral:
-                comida_ded = int(min(dur_real, cfg.tope_descuento_comida_min))
-                comida_fin_ventana = add_minutes(sal_com, comida_ded)
-            else:
-                comida_ded = int(dur_real)
-                comida_fin_ventana = fin_real
+    comida_fin_m = -1  # fin de ventana descontada (para solapes con NoLaborado)
+    if sal_com_m >= 0:
+        fin_real_m = reg_com_m if reg_com_m >= 0 else sal_m
+        dur_real = (fin_real_m - sal_com_m) % 1440
+        if dur_real <= umbral_comida:
+            comida_ded = int(min(dur_real, tope_comida))
+            comida_fin_m = (sal_com_m + comida_ded) % 1440
+        else:
+            comida_ded = int(dur_real)
+            comida_fin_m = fin_real_m
     # --- Cena (real)
-    sal_cen = eventos.get("Salida a cenar")
-    reg_cen = eventos.get("Regreso de cenar")
     cena_ded = 0
-    if sal_cen and reg_cen:
-        cena_ded = minutos_entre(sal_cen, reg_cen)
-    elif sal_cen and not reg_cen and sal:
-        # caso incompleto: asume fin = Salida
-        cena_ded = minutos_entre(sal_cen, sal)
+    fin_cen_m = -1
+    if sal_cen_m >= 0:
+        # caso incompleto (sin regreso): asume fin = Salida
+        fin_cen_m = reg_cen_m if reg_cen_m >= 0 else sal_m
+        cena_ded = (fin_cen_m - sal_cen_m) % 1440
+    if not nl and not isinstance(nl, MergedIntervals):
+        # Ruta rápida (caso más común): sin NoLaborado no hay ventanas, recortes ni fusiones
+        trabajado = max(0, total - comida_ded - cena_ded)
+        extra = max(0, trabajado - umbral_extra)
+        if round_fn is not None:
+            extra = round_fn(extra, round_step)
+        return trabajado, extra, comida_ded, cena_ded, 0, 0, 0, 0
     # --- Salidas extraordinarias (real) con validación de solapes
     extra_ded = 0
     nolab_overlap_cd = 0   # solape NoLaborado con comida/cena (no se duplica)
     nolab_solape_interno = 0  # solape entre intervalos NoLaborado (se fusionan)
     ignored_outside_shift = 0  # minutos de NoLaborado capturados fuera de la jornada
     # Construir ventanas "ya descontadas" para evitar doble descuento
-    ventanas_descuento = []  # lista de (ini, fin)
-    if sal_com and comida_fin_ventana:
+    ventanas_descuento = []  # lista de (ini, fin) en minutos de jornada
+    if sal_com_m >= 0 and comida_fin_m >= 0:
         # Ventana de descuento de comida: hasta media hora (si <= umbral) o hasta regreso real (si excede umbral)
-        ventanas_descuento.append((sal_com, comida_fin_ventana))
-    if sal_cen:
-        fin_cen = reg_cen if reg_cen is not None else sal
-        if fin_cen:
-            ventanas_descuento.append((sal_cen, fin_cen))
-    # Helpers de línea de tiempo relativa a la jornada (soporta cruce de medianoche)
-    crosses_midnight = sal < ent  # si la salida es "menor" que la entrada, cruza al día siguiente
-    def _to_shift_dt(t: time) -> datetime:
-        """Convierte una hora a datetime relativo a la jornada.
-        En turnos nocturnos, horas menores que Entrada se consideran del día siguiente."""
-        base = datetime(2000, 1, 1, t.hour, t.minute)
-        if crosses_midnight and t < ent:
-            base += timedelta(days=1)
-        return base
-    def _window(ent_t: time, sal_t: time) -> Tuple[datetime, datetime]:
-        a = _to_shift_dt(ent_t)
-        b = _to_shift_dt(sal_t)
-        if b < a:
-            b += timedelta(days=1)
-        return a, b
-    def _overlap_min(a1: time, a2: time, b1: time, b2: time) -> int:
-        """Minutos de solape entre intervalos (a1,a2) y (b1,b2) en la misma línea temporal de jornada."""
-        if not a1 or not a2 or not b1 or not b2:
-            return 0
-        A1, A2 = _to_shift_dt(a1), _to_shift_dt(a2)
-        B1, B2 = _to_shift_dt(b1), _to_shift_dt(b2)
-        if A2 < A1:
-            A2 += timedelta(days=1)
-        if B2 < B1:
-            B2 += timedelta(days=1)
-        s = max(A1, B1)
-
-        e = min(A2, B2)
-        if e <= s:
-            return 0
-        return int((e - s).total_seconds() // 60)
-    def _clip_to_shift(ini_t: time, fin_t: time, ent_t: time, sal_t: time) -> Optional[Tuple[time, time, int]]:
-        """Recorta un intervalo (ini, fin) a la ventana [Entrada, Salida] en la línea temporal de la jornada.
-        Devuelve (ini_recortado, fin_recortado, minutos_ignorados_fuera_de_jornada)."""
-        s0, s1 = _window(ent_t, sal_t)
-        a0 = _to_shift_dt(ini_t)
-        a1 = _to_shift_dt(fin_t)
-        if a1 < a0:
-            a1 += timedelta(days=1)
-        i0 = max(a0, s0)
-        i1 = min(a1, s1)
-        if i1 <= i0:
-            # todo fuera
-            ignorados = int((a1 - a0).total_seconds() // 60)
-            return None
-        inside = int((i1 - i0).total_seconds() // 60)
-        total_i = int((a1 - a0).total_seconds() // 60)
-        ignorados = max(0, total_i - inside)
-        return time(i0.hour, i0.minute), time(i1.hour, i1.minute), ignorados
-    if no_laborado_extra:
+        ventanas_descuento.append(_shift_window(sal_com_m, comida_fin_m, ent_m, crosses_midnight))
+    if sal_cen_m >= 0:
+        ventanas_descuento.append(_shift_window(sal_cen_m, fin_cen_m, ent_m, crosses_midnight))
+    # La jornada en su propia línea temporal es [Entrada, Entrada + total]: ya calculado arriba.
+    shift_ini = ent_m
+    shift_fin = ent_m + total
+    # Intervalos fusionados como dos listas paralelas de int (inicios / fines)
+    m_starts: List[int] = []
+    m_ends: List[int] = []
+    if isinstance(nl, MergedIntervals):
+        # Ya recortados y fusionados al insertarse: solo queda el descuento
+        m_starts, m_ends = nl.starts, nl.ends
+        nolab_solape_interno = nl.solape_interno
+        ignored_outside_shift = nl.ignorados
+    elif nl:
         # Normalizar: convertir a lista de intervalos efectivos y ordenar por inicio
         intervals = []
-        ignored_outside_shift = 0
-        for ini, fin, _nota in no_laborado_extra:
-            if ini is None:
-                continue
-            fin_eff = fin if fin is not None else sal
-            if fin_eff is None:
-                continue
+        for ini_m, fin_m in nl:
             # Recortar a la jornada [Entrada, Salida] para evitar descuentos fuera de turno
-            clipped = _clip_to_shift(ini, fin_eff, ent, sal)
+            clipped = _clip_to_shift(ini_m, fin_m, ent_m, crosses_midnight, shift_ini, shift_fin)
             if clipped is None:
                 # Intervalo completamente fuera de la jornada (se ignora pero se contabiliza como advertencia)
-                try:
-                    ignored_outside_shift += minutos_entre(ini, fin_eff)
-                except Exception:
-                    _log.debug("Error calculando intervalo ignorado fuera de jornada", exc_info=True)
+                ignored_outside_shift += (fin_m - ini_m) % 1440
                 continue
             ini_c, fin_c, ign = clipped
             ignored_outside_shift += ign
             intervals.append((ini_c, fin_c))
-        # Ordenar por inicio (considerando hora)
-        # Ordenar por posición relativa desde Entrada (maneja turnos nocturnos)
-        intervals.sort(key=lambda x: minutos_entre(ent, x[0]))
+        # Ordenar por posición relativa desde Entrada (ya en minutos de jornada: maneja turnos nocturnos)
+        intervals.sort(key=_first)
         # Fusionar solapes internos
-        merged = []
+        last_fin = -1
         for ini, fin in intervals:
-            if not merged:
-                merged.append([ini, fin])
+            if not m_ends:
+                m_starts.append(ini)
+                m_ends.append(fin)
+                last_fin = fin
                 continue
-            last_ini, last_fin = merged[-1]
+            last_ini = m_starts[-1]
+            ov = _overlap_min(last_ini, last_fin, ini, fin)
             # Si solapan o se enciman
-            if _overlap_min(last_ini, last_fin, ini, fin) > 0 or (last_fin == ini):
+            if ov > 0 or (last_fin == ini):
                 # calcular solape interno aproximado
-                nolab_solape_interno += _overlap_min(last_ini, last_fin, ini, fin)
-                # extender fin si es necesario
-                # comparar fin en dt
-                def _to_dt(t: time) -> datetime:
-                    # Usar la misma línea temporal de la jornada para turnos nocturnos.
-                    return _to_shift_dt(t)
-                lf = _to_dt(last_fin); cf = _to_dt(fin)
-                li = _to_dt(last_ini); ci = _to_dt(ini)
-                if lf < li: lf += timedelta(days=1)
-                if cf < ci: cf += timedelta(days=1)
+                nolab_solape_interno += ov
                 # mantener inicio más temprano (last_ini) y fin más tardío
-                if cf > lf:
-                    merged[-1][1] = fin
+                if fin > last_fin:
+                    m_ends[-1] = last_fin = fin
             else:
-
-                merged.append([ini, fin])
+                m_starts.append(ini)
+                m_ends.append(fin)
+                last_fin = fin
+    if m_starts:
         # Descontar merged evitando doble descuento con comida/cena
-        for ini, fin in merged:
-            dur = minutos_entre(ini, fin)
-            ov = 0
-            for v_ini, v_fin in ventanas_descuento:
-                ov += _overlap_min(ini, fin, v_ini, v_fin)
-            nolab_overlap_cd += ov
-            extra_ded += max(0, dur - ov)
+        if not ventanas_descuento:
+            # sin comida/cena no hay solape posible: la suma de duraciones basta
+            extra_ded = sum(m_ends) - sum(m_starts)
+        else:
+            for ini, fin in zip(m_starts, m_ends):
+                dur = fin - ini
+                ov = 0
+                for v_ini, v_fin in ventanas_descuento:
+                    ov += _overlap_min(ini, fin, v_ini, v_fin)
+                nolab_overlap_cd += ov
+                extra_ded += max(0, dur - ov)
     trabajado = max(0, total - comida_ded - cena_ded - extra_ded)
-    extra = max(0, trabajado - cfg.umbral_extra_min)
+    extra = max(0, trabajado - umbral_extra)
     # Horas extra SIN redondeo (se dejan exactas al minuto). Si en el futuro se desea,
     # se puede habilitar redondeo poniendo redondeo_extra_step_min > 1 y redondeo_extra_modo distinto de "none".
-    if getattr(cfg, "redondeo_extra_step_min", 1) and cfg.redondeo_extra_step_min > 1 and getattr(cfg, "redondeo_extra_modo", "none") != "none":
-        extra = round_minutes(extra, cfg.redondeo_extra_step_min, cfg.redondeo_extra_modo)
+    if round_fn is not None:
+        extra = round_fn(extra, round_step)
     return trabajado, extra, comida_ded, cena_ded, extra_ded, nolab_overlap_cd, nolab_solape_interno, ignored_outside_shift
 # ---------------------------
 # Lectura / procesamiento Excel
@@ -16,16 +16,22 @@ Design goals:
 
 from __future__ import annotations
 
-import copy
+import atexit
 import json
-from dataclasses import dataclass, asdict
+import os
+import sys
+from collections import Counter
+from dataclasses import dataclass, fields
+from functools import lru_cache
+from operator import attrgetter
 from datetime import date, datetime, time
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 
+import numpy as np
 import pandas as pd
 
-from .audit import log_many
+from .audit import append_bytes, log_many
 from .utils import (
     chmod_restringido,
     default_app_data_dir,
@@ -35,12 +41,24 @@ from .utils import (
     verify_hmac_sha256_hex,
 )
 
+try:  # dependencia opcional: serialización nativa más rápida
+    import orjson  # type: ignore
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+_LEGACY = None
+
 
 def _legacy():
     # Lazy import to avoid circular imports (legacy imports corrections).
-    from . import legacy  # type: ignore
+    # Se resuelve una sola vez: el editor interactivo lo llama varias veces por redibujo.
+    global _LEGACY
+    if _LEGACY is None:
+        from . import legacy  # type: ignore
 
-    return legacy
+        _LEGACY = legacy
+    return _LEGACY
 
 
 
@@ -53,14 +71,53 @@ def _resolve_audit_key_dir(script_dir: Path, cfg: Any) -> Path:
     - cfg.audit_key_storage in {'script','local','codedir'}: usar script_dir
     """
     cfg_dir = str(getattr(cfg, "audit_key_dir", "") or "").strip()
+    storage = str(getattr(cfg, "audit_key_storage", "appdata") or "appdata").strip().lower()
+    appname = str(getattr(cfg, "app_name", "procesador") or "procesador")
+    # El entorno (y cwd, para rutas relativas) forma parte de la llave del caché
+    env = (
+        os.environ.get("XDG_DATA_HOME"),
+        os.environ.get("APPDATA"),
+        os.environ.get("HOME"),
+        os.getcwd() if cfg_dir and not os.path.isabs(os.path.expanduser(cfg_dir)) else "",
+    )
+    return _resolve_audit_key_dir_cached(str(script_dir), cfg_dir, storage, appname, env)
+
+
+@lru_cache(maxsize=8)
+def _resolve_audit_key_dir_cached(script_dir: str, cfg_dir: str, storage: str, appname: str, _env: Tuple[Optional[str], ...]) -> Path:
+    # default_app_data_dir crea el directorio y prueba escritura: una vez por combinación
     if cfg_dir:
         return Path(cfg_dir).expanduser().resolve()
-    storage = str(getattr(cfg, "audit_key_storage", "appdata") or "appdata").strip().lower()
     if storage in {"script", "local", "codedir"}:
         return Path(script_dir)
-    appname = str(getattr(cfg, "app_name", "procesador") or "procesador")
     return default_app_data_dir(appname=appname)
 
+# (key_dir, filename, appname) -> (mtime_ns, key_hex, key_id): la llave se relee solo si
+# el archivo cambió; guardar + verificar en la misma corrida hacen un solo read.
+_AUDIT_KEYS: Dict[Tuple[Path, str, str], Tuple[int, str, str]] = {}
+
+
+def _audit_key(script_dir: Path, cfg: Any) -> Tuple[str, str]:
+    """(key_hex, key_id) de la llave de firma, cacheada por ruta y validada con stat()."""
+    key_dir = _resolve_audit_key_dir(script_dir, cfg)
+    filename = str(getattr(cfg, "audit_key_filename", "audit_key.txt"))
+    appname = str(getattr(cfg, "app_name", "procesador") or "procesador")
+    ck = (key_dir, filename, appname)
+    try:
+        mtime = (key_dir / filename).stat().st_mtime_ns
+    except OSError:
+        mtime = -1
+    hit = _AUDIT_KEYS.get(ck)
+    if hit is not None and mtime >= 0 and hit[0] == mtime:
+        return hit[1], hit[2]
+    key_hex, key_id = get_or_create_audit_key(script_dir, filename=filename, key_dir=key_dir, appname=appname)
+    try:
+        _AUDIT_KEYS[ck] = ((key_dir / filename).stat().st_mtime_ns, key_hex, key_id)
+    except OSError:  # llave en el directorio temporal de respaldo: no se cachea
+        _AUDIT_KEYS.pop(ck, None)
+    return key_hex, key_id
+
+
 @dataclass(slots=True)
 class AuditEntry:
     """Append-only audit entry for punch edits."""
@@ -77,35 +134,73 @@ class AuditEntry:
     motivo: str
 
 
+# Serialización por filas: una tupla por entrada (attrgetter) en lugar de
+# dataclasses.asdict, que recorre y copia recursivamente cada valor.
+_AUDIT_FIELDS = tuple(f.name for f in fields(AuditEntry))
+_audit_row = attrgetter(*_AUDIT_FIELDS)
+
+
+def _audit_dicts(audit_log: Optional[List[AuditEntry]]) -> List[Dict[str, object]]:
+    return [dict(zip(_AUDIT_FIELDS, _audit_row(a))) for a in (audit_log or [])]
+
+
+_JSON_INDENT = json.JSONEncoder(ensure_ascii=False, indent=2)
+_JSON_CANONICAL = json.JSONEncoder(ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+# Sin conversiones propias de orjson (datetime/dataclass): lo que json no serializa
+# debe fallar igual con ambos y caer al encoder estándar.
+_ORJSON_STRICT = (orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS) if orjson is not None else 0
+
+
+def _dumps_indent(obj: Any) -> bytes:
+    """JSON UTF-8 con indent=2 (mismo texto con orjson o con json)."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | _ORJSON_STRICT)
+        except TypeError:  # orjson.JSONEncodeError: claves no-str, ints enormes, etc.
+            pass
+    return _JSON_INDENT.encode(obj).encode("utf-8")
+
+
+_JSON_LINE = json.JSONEncoder(ensure_ascii=False)
+
+def _dumps_canonical_std(obj: Any) -> bytes:
+    return _JSON_CANONICAL.encode(obj).encode("utf-8")
+
+
+def _dumps_canonical(obj: Any) -> bytes:
+    """Forma canónica para firmar: llaves ordenadas, separadores compactos, UTF-8.
+
+    Para str/int/bool/None (lo que guarda la auditoría) orjson produce los mismos bytes
+    que json.dumps(sort_keys=True, separators=(",", ":")); solo difiere en floats con
+    exponente, por eso la verificación reintenta con la forma estándar.
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_SORT_KEYS | _ORJSON_STRICT)
+        except TypeError:
+            pass
+    return _dumps_canonical_std(obj)
+
+
+def _loads_bytes(raw: bytes) -> Any:
+    if orjson is not None:
+        try:
+            return orjson.loads(raw)
+        except ValueError:  # orjson.JSONDecodeError: NaN/Infinity, ints enormes, etc.
+            pass
+    return json.loads(raw)
+
+
 def guardar_auditoria_json(path: Path, audit_log: List[AuditEntry]) -> None:
     """Write audit log as JSON (best-effort) and tighten permissions."""
 
     path = Path(path)
     path.parent.mkdir(parents=True, exist_ok=True)
-    data = [asdict(a) for a in (audit_log or [])]
-    path.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+    data = _audit_dicts(audit_log)
+    path.write_bytes(_dumps_indent(data))
     harden_permissions(path)
 
 
-def _rotate_if_needed(path: Path, max_bytes: int) -> None:
-    """Rota el archivo si excede max_bytes (best-effort)."""
-
-    try:
-        path = Path(path)
-        if not path.exists():
-            return
-        if max_bytes and path.stat().st_size > int(max_bytes):
-            ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-            rotated = path.with_name(path.stem + f"_{ts}" + path.suffix)
-            path.rename(rotated)
-            try:
-                chmod_restringido(rotated)
-            except Exception:
-                pass
-    except Exception:
-        return
-
-
 def guardar_auditoria_bundle(
     *,
     out_dir: Path,
@@ -116,7 +211,7 @@ def guardar_auditoria_bundle(
 ) -> Dict[str, Path]:
     """Guarda auditoría con:
 
-    - Bundle por corrida (JSON): auditoria_run_<run_id>.json (meta + entries + firma)
+    - Bundle por corrida (JSON compacto, llaves ordenadas): auditoria_run_<run_id>.json (meta + entries + firma)
     - Índice append-only (JSONL): auditoria_index.jsonl (una línea por corrida)
     - Latest pointer: latest.json
 
@@ -125,6 +220,7 @@ def guardar_auditoria_bundle(
 
     out_dir = Path(out_dir)
     audit_dir = out_dir / getattr(cfg, "audit_dir_name", "auditoria")
+    sync = bool(getattr(cfg, "audit_fsync", False))
     audit_dir.mkdir(parents=True, exist_ok=True)
     try:
         chmod_restringido(audit_dir)
@@ -136,26 +232,20 @@ def guardar_auditoria_bundle(
     index_path = audit_dir / str(getattr(cfg, "audit_index_filename", "auditoria_index.jsonl"))
     latest_path = audit_dir / "latest.json"
 
-    _rotate_if_needed(index_path, int(getattr(cfg, "audit_rotate_max_bytes", 0) or 0))
-
-    entries = [asdict(a) for a in (audit_log or [])]
-    payload_obj = {"meta": run_meta, "entries": entries}
-    payload_bytes = json.dumps(
-        payload_obj, ensure_ascii=False, sort_keys=True, separators=(",", ":")
-    ).encode("utf-8")
+    entries = _audit_dicts(audit_log)
+    # entries/meta se serializan una sola vez (forma canónica) y se reutilizan tanto
+    # para la firma como para el bundle. Con llaves ordenadas, la concatenación es
+    # idéntica a _dumps_canonical({"meta": run_meta, "entries": entries}).
+    entries_bytes = _dumps_canonical(entries)
+    meta_bytes = _dumps_canonical(run_meta)
+    payload_bytes = b'{"entries":' + entries_bytes + b',"meta":' + meta_bytes + b"}"
 
     signature = ""
     key_id = ""
     algo = "NONE"
     if bool(getattr(cfg, "audit_signing_enabled", True)):
         try:
-            key_dir = _resolve_audit_key_dir(script_dir, cfg)
-            key_hex, key_id = get_or_create_audit_key(
-                script_dir,
-                filename=str(getattr(cfg, "audit_key_filename", "audit_key.txt")),
-                key_dir=key_dir,
-                appname=str(getattr(cfg, "app_name", "procesador") or "procesador"),
-            )
+            key_hex, key_id = _audit_key(script_dir, cfg)
             signature = hmac_sha256_hex(key_hex, payload_bytes)
             algo = "HMAC-SHA256"
         except Exception:
@@ -163,14 +253,19 @@ def guardar_auditoria_bundle(
             key_id = ""
             algo = "NONE"
 
-    bundle_obj = {
-        "meta": run_meta,
-        "entries": entries,
-        "signature_algo": algo,
-        "key_id": key_id,
-        "signature": signature,
-    }
-    bundle_path.write_text(json.dumps(bundle_obj, ensure_ascii=False, indent=2), encoding="utf-8")
+    # Bundle = {"entries", "key_id", "meta", "signature", "signature_algo"} en forma canónica
+    bundle_path.write_bytes(
+        b"".join(
+            (
+                b'{"entries":', entries_bytes,
+                b',"key_id":', _dumps_canonical(key_id),
+                b',"meta":', meta_bytes,
+                b',"signature":', _dumps_canonical(signature),
+                b',"signature_algo":', _dumps_canonical(algo),
+                b"}",
+            )
+        )
+    )
     try:
         chmod_restringido(bundle_path)
     except Exception:
@@ -187,17 +282,15 @@ def guardar_auditoria_bundle(
         "key_id": key_id,
         "signature": signature,
     }
-    with open(index_path, "a", encoding="utf-8") as f:
-        f.write(json.dumps(index_line, ensure_ascii=False) + "\n")
+    line = (_JSON_LINE.encode(index_line) + "\n").encode("utf-8")
+    # Descriptor O_APPEND cacheado (audit.py); rota antes de escribir si excede el tope
+    append_bytes(index_path, line, int(getattr(cfg, "audit_rotate_max_bytes", 0) or 0), sync=sync)
     try:
         chmod_restringido(index_path)
     except Exception:
         pass
 
-    latest_path.write_text(
-        json.dumps({"run_id": run_id, "bundle": bundle_path.name}, ensure_ascii=False, indent=2),
-        encoding="utf-8",
-    )
+    latest_path.write_bytes(_dumps_indent({"run_id": run_id, "bundle": bundle_path.name}))
     try:
         chmod_restringido(latest_path)
     except Exception:
@@ -206,28 +299,16 @@ def guardar_auditoria_bundle(
 
     # Append auditoria_cambios.jsonl (detalle por edición, append-only)
     try:
-        recs: List[Dict[str, object]] = []
-        for a in (audit_log or []):
-            recs.append(
-                {
-                    "run_id": run_id,
-                    "emp_id": a.emp_id,
-                    "fecha": a.fecha,
-                    "usuario": a.usuario,
-                    "ts": a.ts,
-                    "accion": a.accion,
-                    "campo": a.campo,
-                    "antes": a.antes,
-                    "despues": a.despues,
-                    "motivo": a.motivo,
-                }
-            )
+        # Mismos dicts ya construidos para el bundle (solo cambia run_id): log_many
+        # los escribe todos con una sola escritura al archivo.
+        recs: List[Dict[str, object]] = [dict(e, run_id=run_id) for e in entries]
         if recs:
             log_many(
                 audit_dir=audit_dir,
                 records=recs,
                 filename=str(getattr(cfg, "audit_changes_filename", "auditoria_cambios.jsonl")),
                 rotate_max_bytes=int(getattr(cfg, "audit_rotate_max_bytes", 0) or 0),
+                sync=sync,
             )
     except Exception:
         pass
@@ -239,37 +320,38 @@ def verificar_auditoria_bundle(bundle_path: Path, script_dir: Path, cfg: Any) ->
     """Verifica la firma del bundle (si está habilitada)."""
 
     try:
-        obj = json.loads(Path(bundle_path).read_text(encoding="utf-8"))
+        obj = _loads_bytes(Path(bundle_path).read_bytes())
         algo = str(obj.get("signature_algo") or "")
         if algo != "HMAC-SHA256":
             return False
         signature = str(obj.get("signature") or "")
         payload_obj = {"meta": obj.get("meta"), "entries": obj.get("entries")}
-        payload_bytes = json.dumps(
-            payload_obj, ensure_ascii=False, sort_keys=True, separators=(",", ":")
-        ).encode("utf-8")
-        key_dir = _resolve_audit_key_dir(script_dir, cfg)
-        key_hex, _kid = get_or_create_audit_key(
-            script_dir,
-            filename=str(getattr(cfg, "audit_key_filename", "audit_key.txt")),
-            key_dir=key_dir,
-            appname=str(getattr(cfg, "app_name", "procesador") or "procesador"),
-        )
-        return verify_hmac_sha256_hex(key_hex, payload_bytes, signature)
+        payload_bytes = _dumps_canonical(payload_obj)
+        key_hex, _kid = _audit_key(script_dir, cfg)
+        if verify_hmac_sha256_hex(key_hex, payload_bytes, signature):
+            return True
+        # Bundles firmados con la forma estándar de json (p.ej. floats con exponente)
+        std_bytes = _dumps_canonical_std(payload_obj)
+        return std_bytes != payload_bytes and verify_hmac_sha256_hex(key_hex, std_bytes, signature)
     except Exception:
         return False
 
 
+# Tabla "HH:MM" por minuto del día: _fmt_hhmm se llama en cada redibujo del editor.
+_HHMM = tuple(f"{h:02d}:{m:02d}" for h in range(24) for m in range(60))
+
+
 def _fmt_hhmm(t: Optional[time]) -> str:
     if t is None:
         return ""
-    return f"{t.hour:02d}:{t.minute:02d}"
+    return _HHMM[t.hour * 60 + t.minute]
 
 
+@lru_cache(maxsize=4096)
 def _minutes_to_hhmm(m: int) -> str:
-    sign = "-" if m < 0 else ""
-    m = abs(int(m))
-    return f"{sign}{m // 60:02d}:{m % 60:02d}"
+    # Cacheado: en el editor se formatean los mismos minutos en cada redibujo.
+    h, mm = divmod(abs(int(m)), 60)
+    return f"{'-' if m < 0 else ''}{h:02d}:{mm:02d}"
 
 
 def _minutes_to_hhmm_with_min(m: int) -> str:
@@ -287,15 +369,56 @@ def _safe_input(prompt: str, default: str = "") -> str:
     return s if s else default
 
 
+_READLINE_LISTO = False
+
+
+def _habilitar_historial(cfg: Any) -> None:
+    """Activa readline (edición de línea + historial con flechas) para el editor.
+
+    Best-effort y solo en terminal real: sin readline (Windows) o con stdin
+    redirigido, input() queda igual. El historial puede contener motivos, así que
+    vive en el directorio de datos de la app con permisos restringidos.
+    """
+    global _READLINE_LISTO
+    if _READLINE_LISTO:
+        return
+    _READLINE_LISTO = True
+    try:
+        if not sys.stdin.isatty():
+            return
+        import readline  # type: ignore
+    except Exception:
+        return
+    appname = str(getattr(cfg, "app_name", "procesador") or "procesador")
+    try:
+        hist = default_app_data_dir(appname=appname) / "editor_history"
+    except Exception:
+        return
+    try:
+        readline.read_history_file(str(hist))
+    except Exception:
+        pass
+    readline.set_history_length(500)
+
+    def _guardar() -> None:
+        try:
+            readline.write_history_file(str(hist))
+            chmod_restringido(hist)
+        except Exception:
+            pass
+
+    atexit.register(_guardar)
+
+
 def _is_yes(s: str) -> bool:
     s = (s or "").strip().lower()
     return s in {"s", "si", "sí", "y", "yes"}
 
 
 def _sanitize_text(s: str, max_len: int = 300) -> str:
-    # Evita saltos de línea y control chars para logs/JSON.
-    s = (s or "").replace("\r", " ").replace("\n", " ")
-    s = " ".join(s.split())
+    # Evita saltos de línea y control chars para logs/JSON. split() sin argumentos ya
+    # corta en \r, \n, \t, \x0b-\x0c y \x1c-\x1f: basta una pasada + join.
+    s = " ".join((s or "").split())
     if len(s) > max_len:
         s = s[: max_len - 3] + "..."
     return s
@@ -402,16 +525,11 @@ def _validate_times(times: List[time], times_norm: List[time]) -> Tuple[List[str
     if len(times) > 6:
         warn.append(f"Más de 6 checadas ({len(times)}); se mapearán solo las primeras 6")
 
-    # Duplicados exactos
-    seen = set()
-    dups = []
-    for t in times:
-        k = (t.hour, t.minute)
-        if k in seen:
-            dups.append(_fmt_hhmm(t))
-        seen.add(k)
-    if dups:
-        warn.append(f"Duplicados detectados: {', '.join(sorted(set(dups)))}")
+    # Duplicados exactos (a nivel minuto); Counter solo si el set delata alguno
+    mins = [t.hour * 60 + t.minute for t in times]
+    if len(set(mins)) != len(mins):
+        dups = sorted(m for m, n in Counter(mins).items() if n > 1)
+        warn.append(f"Duplicados detectados: {', '.join(f'{m // 60:02d}:{m % 60:02d}' for m in dups)}")
 
     # Cruce de medianoche
     if times_norm and len(times_norm) >= 2:
@@ -422,28 +540,55 @@ def _validate_times(times: List[time], times_norm: List[time]) -> Tuple[List[str
     if len(times) >= 3 and times != times_norm:
         warn.append("Normalización reordenó checadas")
 
-    # Rango
-    try:
-        for t in times:
-            if t.hour < 0 or t.hour > 23 or t.minute < 0 or t.minute > 59:
-                err.append("Hora fuera de rango")
-                break
-    except Exception:
-        err.append("Hora inválida")
-
+    # Rango: datetime.time ya garantiza 0..23 / 0..59 al construirse (no hay nada que validar)
     return warn, err
 
 
 
 
+@lru_cache(maxsize=8)
+def _ascii_fold(text: str) -> str:
+    import unicodedata
+    return unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii")
+
+
 def _safe_print_menu_line(line: str) -> None:
     """Imprime una línea del menú tolerando consolas con encoding limitado (Windows)."""
     try:
         print(line)
     except UnicodeEncodeError:
-        import unicodedata
-        safe = unicodedata.normalize("NFKD", line).encode("ascii", "ignore").decode("ascii")
-        print(safe)
+        print(_ascii_fold(line))
+
+
+_MENU_ADMIN_LINES = (
+    "==========================================================================================",
+    "DASHBOARD / EDITOR (modo admin)",
+    "------------------------------------------------------------------------------------------",
+    "[ADMINISTRACIÓN]",
+    "10) Administrar grupos / IDGRUPO / Activos    (asignar faltantes, mover, bajas/activos)",
+    "",
+    "[EDICIÓN RÁPIDA — recomendado]",
+    " 1) Editar eventos mapeados                   (Entrada / Comer / Cena / Salida)",
+    " 8) Permiso NoLaborado                        (agregar/editar intervalos)",
+    " 7) Aplicar estos cambios a múltiples días    (BULK)",
+    "",
+    "[CONTROL Y VALIDACIÓN]",
+    " 4) Recalcular y validar                      (ver si cuadra todo)",
+    " 5) Revertir cambios                          (volver al estado original)",
+    " 6) Guardar y continuar",
+    "",
+    "[AVANZADO — usar solo si hace falta]",
+    " 2) Insertar marca manual                     (agrega una checada)",
+    " 9) Editar una marca específica               (editar una checada puntual)",
+    " 3) Borrar una marca                          (eliminar una checada)",
+    "",
+    "[SALIR]",
+    " 0) Salir sin guardar                         (volver al menú anterior)",
+    "------------------------------------------------------------------------------------------",
+)
+# Un solo print por redibujo (un acceso a stdout en lugar de ~25)
+_MENU_ADMIN_TEXT = "\n".join(_MENU_ADMIN_LINES)
+
 
 def mostrar_menu_admin() -> None:
     """Muestra el menú principal del dashboard (modo admin).
@@ -451,35 +596,10 @@ def mostrar_menu_admin() -> None:
     Solo presentación (prints). No modifica lógica de negocio ni comportamiento
     de las opciones: los números y las acciones permanecen iguales.
     """
-    _safe_print_menu_line("==========================================================================================")
-    _safe_print_menu_line("DASHBOARD / EDITOR (modo admin)")
-    _safe_print_menu_line("------------------------------------------------------------------------------------------")
-
-    _safe_print_menu_line("[ADMINISTRACIÓN]")
-    _safe_print_menu_line("10) Administrar grupos / IDGRUPO / Activos    (asignar faltantes, mover, bajas/activos)")
-    _safe_print_menu_line("")
-
-    _safe_print_menu_line("[EDICIÓN RÁPIDA — recomendado]")
-    _safe_print_menu_line(" 1) Editar eventos mapeados                   (Entrada / Comer / Cena / Salida)")
-    _safe_print_menu_line(" 8) Permiso NoLaborado                        (agregar/editar intervalos)")
-    _safe_print_menu_line(" 7) Aplicar estos cambios a múltiples días    (BULK)")
-    _safe_print_menu_line("")
+    _safe_print_menu_line(_MENU_ADMIN_TEXT)
 
-    _safe_print_menu_line("[CONTROL Y VALIDACIÓN]")
-    _safe_print_menu_line(" 4) Recalcular y validar                      (ver si cuadra todo)")
-    _safe_print_menu_line(" 5) Revertir cambios                          (volver al estado original)")
-    _safe_print_menu_line(" 6) Guardar y continuar")
-    _safe_print_menu_line("")
 
-    _safe_print_menu_line("[AVANZADO — usar solo si hace falta]")
-    _safe_print_menu_line(" 2) Insertar marca manual                     (agrega una checada)")
-    _safe_print_menu_line(" 9) Editar una marca específica               (editar una checada puntual)")
-    _safe_print_menu_line(" 3) Borrar una marca                          (eliminar una checada)")
-    _safe_print_menu_line("")
-
-    _safe_print_menu_line("[SALIR]")
-    _safe_print_menu_line(" 0) Salir sin guardar                         (volver al menú anterior)")
-    _safe_print_menu_line("------------------------------------------------------------------------------------------")
+_EVENT_KEYS = ("Entrada", "Salida a comer", "Regreso de comer", "Salida a cenar", "Regreso de cenar", "Salida")
 
 
 def _render_dashboard(
@@ -496,12 +616,14 @@ def _render_dashboard(
     notas: str,
     bulk_plan: Optional[Dict[str, object]],
 ) -> None:
-    print("\n" + "=" * 90)
-    print(f"EDICIÓN CHECADAS | ID: {emp_id} | Nombre: {nombre} | Fecha: {fecha_d.isoformat()}")
-    print("-" * 90)
-    print(f"Registro original: {registro_raw}")
-    print(f"Parseadas:    {[ _fmt_hhmm(t) for t in times ]}")
-    print(f"Normalizadas: {[ _fmt_hhmm(t) for t in times_norm ]}")
+    # Todo el dashboard se arma en memoria y se emite con una sola escritura
+    out: List[str] = ["", "=" * 90]
+    emit = out.append
+    emit(f"EDICIÓN CHECADAS | ID: {emp_id} | Nombre: {nombre} | Fecha: {fecha_d.isoformat()}")
+    emit("-" * 90)
+    emit(f"Registro original: {registro_raw}")
+    emit(f"Parseadas:    {[ _fmt_hhmm(t) for t in times ]}")
+    emit(f"Normalizadas: {[ _fmt_hhmm(t) for t in times_norm ]}")
 
     # Vista D / D+1 para evitar confusión en turnos que cruzan medianoche
 
@@ -531,44 +653,34 @@ def _render_dashboard(
         return ' (D)' if d == 0 else f' (D+{d})'
 
 
-    def _tag_for_time(t: Optional[time]) -> str:
-
-        if t is None:
-
-            return ''
-
-        for i, _t in enumerate(times_norm):
+    # (hora, minuto) -> etiqueta D/D+n de la primera checada normalizada con ese valor
+    norm_tags: Dict[Tuple[int, int], str] = {}
+    for i, _t in enumerate(times_norm):
+        norm_tags.setdefault((_t.hour, _t.minute), _tag(i))
 
-            if (_t.hour, _t.minute) == (t.hour, t.minute):
 
-                return _tag(i)
+    def _tag_for_time(t: Optional[time]) -> str:
 
-        return ''
+        return norm_tags.get((t.hour, t.minute), '') if t is not None else ''
 
 
     if any(d > 0 for d in day_offsets):
 
         norm_dd1 = [f'{_fmt_hhmm(times_norm[i])}{_tag(i)}' for i in range(len(times_norm))]
 
-        print(f"Normalizadas (D/D+1): {norm_dd1}")
-    print("Eventos mapeados:")
-    for k in [
-        "Entrada",
-        "Salida a comer",
-        "Regreso de comer",
-        "Salida a cenar",
-        "Regreso de cenar",
-        "Salida",
-    ]:
-        print(f" - {k:16}: {_fmt_hhmm(eventos.get(k))}{_tag_for_time(eventos.get(k))}")
+        emit(f"Normalizadas (D/D+1): {norm_dd1}")
+    emit("Eventos mapeados:")
+    for k in _EVENT_KEYS:
+        t = eventos.get(k)
+        emit(f" - {k:16}: {_fmt_hhmm(t)}{_tag_for_time(t)}")
 
     # Checadas extra/no usadas (cuando hay más de 6)
     if len(times_norm) > 6:
         extras = [f"{_fmt_hhmm(times_norm[i])}{_tag(i)}" for i in range(6, len(times_norm))]
         if extras:
-            print(f"Checadas no usadas: {extras}")
-    print("-" * 90)
-    print(
+            emit(f"Checadas no usadas: {extras}")
+    emit("-" * 90)
+    emit(
         f"Trabajado provisional: {preview.get('trab_hhmm')} | Extra: {preview.get('extra_hhmm')} "
         f"| Desc comida: {preview.get('comida_desc')} | Desc cena: {preview.get('cena_desc')} | Desc NoLaborado: {preview.get('nolabor_desc', preview.get('extra_desc'))}"
     )
@@ -577,34 +689,37 @@ def _render_dashboard(
     comida_real = int(preview.get('comida_real_min') or 0)
     cena_real = int(preview.get('cena_real_min') or 0)
     if comida_real > 0:
-        print(
+        emit(
             f"Comida real:      {_minutes_to_hhmm_with_min(comida_real)} {preview.get('comida_interval', '')}".rstrip()
         )
     else:
-        print("Comida real:      (sin comida)")
+        emit("Comida real:      (sin comida)")
 
-    print(f"Descuento comida: {preview.get('comida_desc')} {preview.get('comida_explain')}")
+    emit(f"Descuento comida: {preview.get('comida_desc')} {preview.get('comida_explain')}")
 
     if cena_real > 0:
-        print(
+        emit(
             f"Cena real:        {_minutes_to_hhmm_with_min(cena_real)} {preview.get('cena_interval', '')}".rstrip()
         )
     else:
-        print("Cena real:        (sin cena)")
+        emit("Cena real:        (sin cena)")
 
-    print(f"Descuento cena:   {preview.get('cena_desc')} {preview.get('cena_explain')}")
+    emit(f"Descuento cena:   {preview.get('cena_desc')} {preview.get('cena_explain')}")
     nol_txt = _fmt_nolabor(preview.get('_no_labor_list')) if isinstance(preview.get('_no_labor_list'), list) else ""
     if nol_txt:
-        print(f"NoLaborado (intervalos): {nol_txt}")
+        emit(f"NoLaborado (intervalos): {nol_txt}")
     if notas:
-        print(f"Notas: {notas}")
+        emit(f"Notas: {notas}")
     if bulk_plan:
         n = len(bulk_plan.get("dates", []) or [])
-        print(f"BULK pendiente: se aplicará a {n} fecha(s) al continuar el lote")
-    print("Estado:", "CAMBIOS PENDIENTES" if dirty else "SIN CAMBIOS")
-    print("=" * 90)
-    mostrar_menu_admin()
-    print("")
+        emit(f"BULK pendiente: se aplicará a {n} fecha(s) al continuar el lote")
+    emit("Estado: " + ("CAMBIOS PENDIENTES" if dirty else "SIN CAMBIOS"))
+    emit("=" * 90)
+    emit(_MENU_ADMIN_TEXT)
+    emit("")
+    _safe_print_menu_line("\n".join(out))
+
+
 def _fmt_nolabor(no_labor: Optional[List[Tuple[Optional[time], Optional[time], str]]]) -> str:
     """Formatea intervalos NoLaborado a un string compacto."""
     if not no_labor:
@@ -775,23 +890,14 @@ def _parse_date_list(expr: str) -> List[date]:
                 continue
             if db < da:
                 da, db = db, da
-            cur = da
-            while cur <= db:
-                out.append(cur)
-                cur = cur.fromordinal(cur.toordinal() + 1)
+            # Rango inclusivo expandido por ordinal (sin aritmética de fechas por día)
+            out.extend(map(date.fromordinal, range(da.toordinal(), db.toordinal() + 1)))
         else:
             d = _legacy().parse_date(p)
             if d:
                 out.append(d)
     # uniq preserve order
-    seen = set()
-    final = []
-    for d in out:
-        if d in seen:
-            continue
-        seen.add(d)
-        final.append(d)
-    return final
+    return list(dict.fromkeys(out))
 
 
 def editar_checadas_interactivo(
@@ -821,6 +927,7 @@ def editar_checadas_interactivo(
     """
 
     audit_log = audit_log if audit_log is not None else []
+    _habilitar_historial(cfg)
 
     def _audit(accion: str, campo: str, antes: object, despues: object, motivo: str) -> None:
         audit_log.append(
@@ -843,31 +950,40 @@ def editar_checadas_interactivo(
         registro_display = registro_raw
 
     times = _legacy().parse_registro(registro_raw)
-    times_snapshot = copy.deepcopy(times)
+    # Snapshots inmutables (tuplas): time y (ini, fin, nota) ya lo son, así que el
+    # estado original no puede alterarse por las ediciones y REVERT solo crea la lista.
+    times_snapshot = tuple(times)
 
     no_labor_list: List[Tuple[Optional[time], Optional[time], str]] = []
     if isinstance(no_labor, list):
         # Copia defensiva: solo se persiste si el usuario guarda.
-        no_labor_list = copy.deepcopy(no_labor)
-    no_labor_snapshot = copy.deepcopy(no_labor_list)
+        no_labor_list = [tuple(x) for x in no_labor]
+    no_labor_snapshot = tuple(no_labor_list)
 
     nota_final = ""
     dirty = False
     bulk_plan: Optional[Dict[str, object]] = None
 
+    # Estado (checadas, NoLaborado) del último cálculo: las opciones que no modifican
+    # nada (recalcular, volver, entradas inválidas) no repiten normalizar/mapear/calcular.
+    calc_key: Optional[Tuple[tuple, tuple]] = None
+
     while True:
-        times_norm, reord = _normalize_times(times, modo_seguro)
-        eventos = _map_eventos(times_norm)
-        preview = _recalc_preview(eventos, cfg, no_labor=no_labor_list)
-
-        warn, err = _validate_times(times, times_norm)
-        notas = ""
-        if reord and not modo_seguro:
-            notas += "Normalización reordenó checadas. "
-        if warn:
-            notas += "WARN: " + "; ".join(warn) + ". "
-        if err:
-            notas += "ERROR: " + "; ".join(err) + ". "
+        key = (tuple(times), tuple(no_labor_list))
+        if key != calc_key:
+            times_norm, reord = _normalize_times(times, modo_seguro)
+            eventos = _map_eventos(times_norm)
+            preview = _recalc_preview(eventos, cfg, no_labor=no_labor_list)
+
+            warn, err = _validate_times(times, times_norm)
+            notas = ""
+            if reord and not modo_seguro:
+                notas += "Normalización reordenó checadas. "
+            if warn:
+                notas += "WARN: " + "; ".join(warn) + ". "
+            if err:
+                notas += "ERROR: " + "; ".join(err) + ". "
+            calc_key = key
 
         _render_dashboard(
             emp_id=emp_id,
@@ -886,7 +1002,7 @@ def editar_checadas_interactivo(
         op = _safe_input("Opción: ").strip()
         if op == "0":
             # salir SIN guardar: descartar cambios de checadas y NoLaborado
-            return None, "", None, no_labor_snapshot
+            return None, "", None, list(no_labor_snapshot)
 
         if op == "10":
             # Administración de grupos/IDGRUPO/Activos (para faltas). No modifica checadas.
@@ -908,19 +1024,14 @@ def editar_checadas_interactivo(
                 except Exception:
                     pass
                 print(f"\n[WARN] No se pudo abrir el admin de grupos: {e}")
+            # el admin recibe cfg: recalcular por si cambió algún parámetro
+            calc_key = None
             continue
 
         if op == "1":
             # Edición por EVENTO mapeado (recomendado). Esto evita que RH tenga que
             # entender la lista cruda de checadas.
-            event_order = [
-                "Entrada",
-                "Salida a comer",
-                "Regreso de comer",
-                "Salida a cenar",
-                "Regreso de cenar",
-                "Salida",
-            ]
+            event_order = _EVENT_KEYS
             print("\nEditar evento mapeado:")
             for i, k in enumerate(event_order, start=1):
                 v = eventos.get(k)
@@ -951,7 +1062,7 @@ def editar_checadas_interactivo(
                 continue
 
             # Construye slots fijos (6) desde eventos actuales.
-            core_slots: List[Optional[time]] = [eventos.get(name) for name in event_order]
+            core_slots: List[Optional[time]] = list(map(eventos.get, event_order))
             unused: List[time] = times_norm[6:] if len(times_norm) > 6 else []
 
             core_slots[eidx] = tnew
@@ -1052,8 +1163,8 @@ def editar_checadas_interactivo(
         elif op == "5":
             motivo = _safe_input("Motivo de revertir: ").strip()
             _audit("REVERT", "state", "dirty", "snapshot", motivo)
-            times = copy.deepcopy(times_snapshot)
-            no_labor_list = copy.deepcopy(no_labor_snapshot)
+            times = list(times_snapshot)
+            no_labor_list = list(no_labor_snapshot)
             dirty = False
             bulk_plan = None
 
@@ -1136,24 +1247,31 @@ def construir_reporte_auditoria(*, run_meta: Dict[str, object], audit_log: List[
     run_rows = [{"Campo": k, "Valor": v} for k, v in (run_meta or {}).items()]
     df_run = pd.DataFrame(run_rows)
 
-    if audit_log:
-        df_ed = pd.DataFrame([asdict(a) for a in audit_log])
-    else:
+    str_cols = {c: str for c in ("emp_id", "fecha", "accion", "usuario", "campo")}
+    if not audit_log:
+        # Corrida sin ediciones (caso común): marcos vacíos sin factorize/conteos
         df_ed = pd.DataFrame(
             columns=["run_id", "emp_id", "fecha", "accion", "campo", "antes", "despues", "motivo", "usuario", "ts"]
-        )
-
-    for col in ["emp_id", "fecha", "accion", "usuario", "campo"]:
-        if col in df_ed.columns:
-            df_ed[col] = df_ed[col].astype(str)
+        ).astype(str_cols)
+        return {
+            "RUN": df_run,
+            "EDICIONES": df_ed,
+            "POR_USUARIO": pd.DataFrame(columns=["usuario", "ediciones"]),
+            "POR_EMPLEADO": pd.DataFrame(columns=["emp_id", "ediciones"]),
+            "POR_FECHA": pd.DataFrame(columns=["fecha", "ediciones"]),
+            "POR_ACCION": pd.DataFrame(columns=["accion", "ediciones"]),
+        }
+
+    df_ed = pd.DataFrame.from_records([_audit_row(a) for a in audit_log], columns=list(_AUDIT_FIELDS))
+    df_ed = df_ed.astype(str_cols)
 
     def _group_count(col: str, name: str) -> pd.DataFrame:
-        if col not in df_ed.columns or df_ed.empty:
-            return pd.DataFrame(columns=[name, "ediciones"])
-        s = df_ed[col].fillna("").astype(str)
-        out = s.value_counts().reset_index()
-        out.columns = [name, "ediciones"]
-        return out
+        # Columnas ya convertidas a str arriba: un solo hash por columna (factorize) y
+        # conteo por código; orden estable = mismo orden que value_counts().
+        codes, uniques = pd.factorize(df_ed[col].fillna(""))
+        counts = np.bincount(codes, minlength=len(uniques))
+        order = np.argsort(-counts, kind="stable")
+        return pd.DataFrame({name: uniques[order], "ediciones": counts[order]})
 
     return {
         "RUN": df_run,
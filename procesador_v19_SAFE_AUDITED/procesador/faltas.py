@@ -6,14 +6,72 @@ Separamos el cálculo de faltas y la carga de plantilla de empleados.
 from __future__ import annotations
 
 from datetime import date, timedelta
+from functools import lru_cache
 from pathlib import Path
+from types import MappingProxyType
 from typing import Optional, Tuple
 
 import pandas as pd
 
-from .utils import normalize_id, _week_key, _month_key
+from .config import AppConfig, EmpleadoRec
+from .utils import normalize_id, _week_month_keys
 from .groups import make_emp_key
 
+
+# IDs/nombres se repiten mucho (export y plantilla): normalizar una vez por valor.
+# typed=True: 1, 1.0 y True no comparten entrada (normalize_id distingue "True").
+@lru_cache(maxsize=65536, typed=True)
+def _pad3(v: object) -> str:
+    return normalize_id(v, 3)
+
+
+@lru_cache(maxsize=65536, typed=True)
+def _emp_key3(eid: object, nombre: object) -> str:
+    return make_emp_key(eid, nombre, 3)[0]
+
+
+# Encabezados que reconoce cargar_plantilla_empleados (minúsculas, sin BOM/espacios):
+# el resto de columnas del Excel no se materializa al leer.
+_PLANTILLA_COLS = frozenset({
+    "id", "id_empleado", "empleado", "employeeid",
+    "nombre", "name",
+    "idgrupo", "id_grupo", "grupo", "grupo_id", "id grupo",
+    "activo", "active", "estatus", "status",
+    "fechaalta", "fechabaja",
+})
+
+
+def _es_col_plantilla(c: object) -> bool:
+    return str(c).replace('\ufeff','').strip().lower() in _PLANTILLA_COLS
+
+
+# Última plantilla leída, por (ruta, mtime_ns, tamaño): releer el mismo archivo sin
+# cambios no vuelve a parsear el XML. Solo en memoria (sin caché en disco).
+_PLANTILLA_CACHE: dict = {}
+
+
+# Meta vacía compartida (solo lectura): evita crear un dict por empleado sin meta
+_SIN_META = MappingProxyType({})
+
+_ACTIVO_SI = frozenset({"si","sí","s","1","true","activo","active","yes","y"})
+
+
+def _activo_mask(activo: pd.Series) -> pd.Series:
+    """Columna Activo -> bool en una pasada (texto normalizado contra _ACTIVO_SI)."""
+    return activo.astype(str).str.strip().str.lower().isin(_ACTIVO_SI)
+
+
+def _leer_plantilla_excel(path: Path) -> pd.DataFrame:
+    st = path.stat()
+    key = (str(path.resolve()), st.st_mtime_ns, st.st_size)
+    df = _PLANTILLA_CACHE.get(key)
+    if df is None:
+        df = pd.read_excel(path, dtype=str, usecols=_es_col_plantilla)
+        _PLANTILLA_CACHE.clear()
+        _PLANTILLA_CACHE[key] = df
+    return df.copy()
+
+
 def cargar_plantilla_empleados(script_dir: Path, ruta: str = "", cfg: 'object | None' = None, empleados_detectados: 'list[str] | None' = None) -> "pd.DataFrame | None":
     """Carga plantilla de empleados activos (Opción A).
     Mínimo: columna ID. Opcionales: Nombre, Activo (SI/NO), FechaAlta, FechaBaja.
@@ -35,25 +93,21 @@ def cargar_plantilla_empleados(script_dir: Path, ruta: str = "", cfg: 'object |
                 # si no hay nada, cae al comportamiento previo
                 if ids:
                     rows = []
+                    empleados = cfg.empleados()
+                    vacio = EmpleadoRec()
                     for emp in sorted(ids):
-                        meta = (getattr(cfg, "empleado_meta", {}) or {}).get(emp, {}) or {}
-                        st = (getattr(cfg, "empleado_status", {}) or {}).get(emp, {}) or {}
-                        activo = bool(st.get("activo", True))
-                        nombre = str(meta.get("nombre", "") or "")
-                        idgrupo = str((getattr(cfg, "empleado_a_idgrupo", {}) or {}).get(emp, "") or "")
-                        rows.append({"ID": emp, "Nombre": nombre, "Activo": "SI" if activo else "NO", "IDGRUPO": idgrupo})
+                        rec = empleados.get(emp, vacio)
+                        nombre = str(rec.meta.get("nombre", "") or "")
+                        rows.append({"ID": emp, "Nombre": nombre, "Activo": "SI" if rec.activo else "NO", "IDGRUPO": rec.idgrupo})
                     df = pd.DataFrame(rows)
                     # Normalizar como plantilla
                     df["ID"] = df["ID"].astype(str).str.strip()
-                    df["ID"] = df["ID"].apply(lambda x: normalize_id(x, 3))
-                    df["ID"] = df.apply(lambda r: make_emp_key(r.get("ID",""), r.get("Nombre",""), 3)[0], axis=1)
+                    df["ID"] = df["ID"].map(_pad3)
+                    df["ID"] = [_emp_key3(i, n) for i, n in zip(df["ID"], df["Nombre"])]
                     df["Nombre"] = df["Nombre"].astype(str).fillna("").astype(str)
                     if "IDGRUPO" in df.columns:
                         df["IDGRUPO"] = df["IDGRUPO"].astype(str).fillna("").astype(str).str.strip()
-                    def _is_active(x):
-                        s = str(x or "").strip().lower()
-                        return s in ("si","sí","s","1","true","activo","active","yes","y")
-                    df["_activo"] = df["Activo"].apply(_is_active)
+                    df["_activo"] = _activo_mask(df["Activo"])
                     # fechas opcionales
                     for c in ("FechaAlta","FechaBaja"):
                         if c not in df.columns:
@@ -66,7 +120,7 @@ def cargar_plantilla_empleados(script_dir: Path, ruta: str = "", cfg: 'object |
         print("        (Solución: coloca plantilla_empleados.xlsx junto al script o usa --plantilla.)")
         return None
     try:
-        df = pd.read_excel(path, dtype=str)
+        df = _leer_plantilla_excel(path)
     except Exception:
         print(f"[AVISO] No se pudo leer la plantilla de empleados: {path}.")
         print("        Se omitirá el cálculo de FALTAS.")
@@ -81,28 +135,40 @@ def cargar_plantilla_empleados(script_dir: Path, ruta: str = "", cfg: 'object |
         return pd.DataFrame()
     df = df.rename(columns={id_col:"ID"})
     df["ID"] = df["ID"].astype(str).str.strip()
-    df["ID"] = df["ID"].apply(lambda x: normalize_id(x, 3))
+    df["ID"] = df["ID"].map(_pad3)
     # Caso SIN ID: si ID es texto (nombre) lo convertimos a clave interna NOMBRE:: para que coincida con el export.
-    df["ID"] = df.apply(lambda r: make_emp_key(r.get("ID",""), r.get("Nombre",""), 3)[0], axis=1)
+    nombres = df["Nombre"] if "Nombre" in df.columns else [""] * len(df)
+    df["ID"] = [_emp_key3(i, n) for i, n in zip(df["ID"], nombres)]
     # OVERRIDE_CONFIG: si cfg trae estatus/nombre, aplicar sobre plantilla
     try:
         if cfg is not None:
             meta_map = getattr(cfg, "empleado_meta", {}) or {}
             st_map = getattr(cfg, "empleado_status", {}) or {}
+            # Columnas como listas y una sola asignación si algo cambió
+            # (sin iterrows + df.at por fila; sin cambios se conserva el dtype)
+            eids = [str(x).strip() for x in df["ID"]]
             if isinstance(meta_map, dict) and "Nombre" in df.columns:
-                for i, r in df.iterrows():
-                    eid = str(r.get("ID","")).strip()
-                    m = meta_map.get(eid, {}) or {}
-                    if (not str(r.get("Nombre","") or "").strip()) and m.get("nombre"):
-                        df.at[i, "Nombre"] = str(m.get("nombre","")).strip()
+                nombres = df["Nombre"].tolist()
+                cambio = False
+                for k, eid in enumerate(eids):
+                    m = meta_map.get(eid) or _SIN_META
+                    if (not str(nombres[k] or "").strip()) and m.get("nombre"):
+                        nombres[k] = str(m.get("nombre","")).strip()
+                        cambio = True
+                if cambio:
+                    df["Nombre"] = nombres
             if isinstance(st_map, dict):
                 if "Activo" not in df.columns:
                     df["Activo"] = "SI"
-                for i, r in df.iterrows():
-                    eid = str(r.get("ID","")).strip()
+                activos = df["Activo"].tolist()
+                cambio = False
+                for k, eid in enumerate(eids):
                     st = st_map.get(eid)
                     if isinstance(st, dict) and ("activo" in st):
-                        df.at[i, "Activo"] = "SI" if bool(st.get("activo", True)) else "NO"
+                        activos[k] = "SI" if bool(st.get("activo", True)) else "NO"
+                        cambio = True
+                if cambio:
+                    df["Activo"] = activos
     except Exception:
         pass
     if "Nombre" not in df.columns:
@@ -130,10 +196,7 @@ def cargar_plantilla_empleados(script_dir: Path, ruta: str = "", cfg: 'object |
                 break
     if "Activo" not in df.columns:
         df["Activo"] = "SI"
-    def _is_active(x):
-        s = str(x).strip().lower()
-        return s in ("si","sí","s","1","true","activo","active","yes","y")
-    df["_activo"] = df["Activo"].apply(_is_active)
+    df["_activo"] = _activo_mask(df["Activo"])
     for col in ("FechaAlta","FechaBaja"):
         if col not in df.columns:
             for c in df.columns:
@@ -141,7 +204,8 @@ def cargar_plantilla_empleados(script_dir: Path, ruta: str = "", cfg: 'object |
                     df = df.rename(columns={c:col})
                     break
         if col in df.columns:
-            df[col] = pd.to_datetime(df[col], errors="coerce").dt.date
+            # datetime64 (NaT = sin límite): calcular_faltas compara vectorizado
+            df[col] = pd.to_datetime(df[col], errors="coerce")
         else:
             df[col] = pd.NaT
     df = df[df["ID"] != ""]
@@ -174,36 +238,64 @@ def calcular_faltas(df_out: pd.DataFrame, plantilla: pd.DataFrame, cfg: AppConfi
     exp_ini = _week_start(min_d)
     exp_fin = _week_end(max_d)
     fechas = pd.date_range(exp_ini, exp_fin, freq="D").date
-    pad = lambda v: normalize_id(v, 3)
-    presentes = set((pad(r.get("ID","")), r["Fecha"].date()) for _, r in df.iterrows() if str(r.get("ID","")).strip()!="")
+    pad = _pad3
+    # (ID, fecha) con checadas: columnas completas en vez de iterrows (sin Series por fila)
+    presentes = set()
+    if "ID" in df.columns:
+        con_id = df["ID"].map(str).str.strip() != ""
+        presentes = set(zip(map(pad, df.loc[con_id, "ID"]), df.loc[con_id, "Fecha"].dt.date))
     nombre_por_id = {}
     if "Nombre" in df.columns:
-
-        for _, r in df[["ID","Nombre"]].dropna().drop_duplicates().iterrows():
-            i = pad(r.get("ID",""))
+        pares = df[["ID","Nombre"]].dropna().drop_duplicates()
+        for i, n in zip(map(pad, pares["ID"]), pares["Nombre"]):
             if i and i not in nombre_por_id:
-                nombre_por_id[i] = str(r.get("Nombre","") or "")
-    for _, r in plantilla.iterrows():
-        i = pad(r.get("ID",""))
-        n = str(r.get("Nombre","") or "")
+                nombre_por_id[i] = str(n or "")
+    n_pl = len(plantilla)
+    pl_ids = plantilla["ID"] if "ID" in plantilla.columns else [""] * n_pl
+    pl_nombres = plantilla["Nombre"] if "Nombre" in plantilla.columns else [""] * n_pl
+    pl_keys = [pad(v) for v in pl_ids]
+    for i, n in zip(pl_keys, pl_nombres):
+        n = str(n or "")
         if i and n:
             nombre_por_id[i]=n
-    detalles=[]
-    for _, emp in plantilla.iterrows():
-        emp_id = pad(emp.get("ID",""))
-        if not emp_id or not bool(emp.get("_activo", True)):
-            continue
-        alta = emp.get("FechaAlta"); baja = emp.get("FechaBaja")
-        for d in fechas:
-            if pd.notna(alta) and alta and d < alta: 
-                continue
-            if pd.notna(baja) and baja and d > baja:
-                continue
-            if (emp_id, d) not in presentes:
-                ts = pd.Timestamp(d)
-                detalles.append({"ID":emp_id,"Nombre":nombre_por_id.get(emp_id,""),"Fecha":ts.date(),
-                                 "Semana":_week_key(ts, cfg),"Mes":_month_key(ts)})
-    df_det = pd.DataFrame(detalles)
+    # Esperado = empleados activos × fechas (cross join) acotado por alta/baja;
+    # faltas = esperado sin checadas (anti-join contra presentes).
+    def _limite(col: str) -> pd.Series:
+        if col not in plantilla.columns:
+            return pd.Series(pd.NaT, index=range(n_pl), dtype="datetime64[ns]")
+        v = plantilla[col]
+        if not pd.api.types.is_datetime64_any_dtype(v):
+            # plantillas armadas a mano / desde config: date, "", None
+            v = pd.to_datetime(pd.Series(v.to_numpy(dtype=object)), errors="coerce")
+        return v.reset_index(drop=True).dt.normalize()
+    act = pd.DataFrame({
+        "ID": pl_keys,
+        "_activo": [bool(x) for x in plantilla["_activo"]] if "_activo" in plantilla.columns else True,
+        "FechaAlta": _limite("FechaAlta"),
+        "FechaBaja": _limite("FechaBaja"),
+    })
+    act = act[(act["ID"] != "") & act["_activo"]].drop(columns="_activo")
+    cj = act.merge(pd.DataFrame({"Fecha": pd.to_datetime(fechas)}), how="cross")
+    alta, baja, f = cj["FechaAlta"], cj["FechaBaja"], cj["Fecha"]
+    cj = cj.loc[(alta.isna() | (f >= alta)) & (baja.isna() | (f <= baja)), ["ID", "Fecha"]]
+    pres = pd.DataFrame(list(presentes), columns=["ID", "Fecha"])
+    pres["Fecha"] = pd.to_datetime(pres["Fecha"])
+    cj = cj.merge(pres, on=["ID", "Fecha"], how="left", indicator=True)
+    faltan = cj.loc[cj["_merge"] == "left_only", ["ID", "Fecha"]].reset_index(drop=True)
+    # Semana/Mes una vez por fecha del rango (aritmética vectorizada), no por falta
+    sem_keys, mes_keys = _week_month_keys(pd.DatetimeIndex(fechas), cfg)
+    semana = dict(zip(fechas, sem_keys))
+    mes = dict(zip(fechas, mes_keys))
+    ids = faltan["ID"].tolist()
+    dias = faltan["Fecha"].dt.date.tolist()
+    # columnas desde listas: mismos dtypes inferidos que el detalle armado por filas
+    df_det = pd.DataFrame({
+        "ID": ids,
+        "Nombre": [nombre_por_id.get(i, "") for i in ids],
+        "Fecha": dias,
+        "Semana": [semana[d] for d in dias],
+        "Mes": [mes[d] for d in dias],
+    })
     if len(df_det)==0:
         return (pd.DataFrame(), pd.DataFrame(), pd.DataFrame())
     df_sem = df_det.groupby(["ID","Nombre","Semana"], as_index=False).agg(Faltas=("Fecha","count"))
@@ -13,10 +13,10 @@ from __future__ import annotations
 from dataclasses import asdict
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Iterable, Optional, Tuple
+from typing import Dict, Iterable, List, Optional, Tuple
 
-from .config import AppConfig, guardar_config
-from .audit import log_change
+from .config import AppConfig, EmpleadoRec, guardar_config
+from .audit import flush_audit as _esperar_auditoria, log_many
 from .utils import _coerce_id_str
 
 def _safe_input(prompt: str, default: str = "") -> str:
@@ -51,6 +51,13 @@ def _suggest_idgrupo(emp_id: str, cfg: AppConfig) -> str:
     pref = cfg.prefijo_de_grupo(g)
     return f"{pref}-{emp}"
 
+# Registros de auditoría pendientes: (audit_dir, filename, rotate_max_bytes, sync, record).
+# Los flujos masivos encolan aquí y escriben el lote con un solo write al terminar.
+_pending_audit: List[Tuple[Path, str, int, bool, Dict[str, object]]] = []
+# Dentro de run_group_admin la escritura va al hilo de audit.py (el menú no espera
+# al disco); al salir del menú se espera a que todo quede escrito.
+_en_menu = False
+
 def _audit_cfg(
     *,
     script_dir: Path,
@@ -59,7 +66,9 @@ def _audit_cfg(
     accion: str,
     detalle: Dict[str, object],
     motivo: str = "",
+    diferido: bool = False,
 ) -> None:
+    """Registra un cambio de mapa/estatus; con diferido=True espera a _flush_audit()."""
     audit_dir = Path(script_dir) / (cfg.audit_dir_name or "auditoria")
     rec = {
         "ts": _now(),
@@ -68,32 +77,58 @@ def _audit_cfg(
         "motivo": motivo or "",
         **{f"d_{k}": v for k, v in (detalle or {}).items()},
     }
-    log_change(
-        audit_dir=audit_dir,
-        record=rec,
-        filename=cfg.audit_changes_filename or "auditoria_cambios.jsonl",
-        rotate_max_bytes=int(getattr(cfg, "audit_rotate_max_bytes", 0) or 0),
-    )
+    _pending_audit.append((
+        audit_dir,
+        cfg.audit_changes_filename or "auditoria_cambios.jsonl",
+        int(getattr(cfg, "audit_rotate_max_bytes", 0) or 0),
+        bool(getattr(cfg, "audit_fsync", False)),
+        rec,
+    ))
+    if not diferido:
+        _flush_audit()
+
+def _flush_audit() -> None:
+    """Escribe los registros pendientes: un write (y a lo más un sync) por archivo destino."""
+    while _pending_audit:
+        destino = _pending_audit[0][:4]
+        n = 1
+        while n < len(_pending_audit) and _pending_audit[n][:4] == destino:
+            n += 1
+        audit_dir, filename, rotate, sync = destino
+        lote = [r[4] for r in _pending_audit[:n]]
+        # con audit_fsync se escribe en línea: el sync no aplica a la cola en segundo plano
+        log_many(
+            audit_dir=audit_dir,
+            records=lote,
+            filename=filename,
+            rotate_max_bytes=rotate,
+            sync=sync,
+            background=_en_menu and not sync,
+        )
+        del _pending_audit[:n]
 
 def _list_missing(processed_ids: Iterable[str], cfg: AppConfig) -> Dict[str, str]:
     out: Dict[str, str] = {}
+    # mapas resueltos una vez (no por empleado)
+    grupo_de = (cfg.empleado_a_grupo or {}).get
+    idgrupo_de = (cfg.empleado_a_idgrupo or {}).get
     for emp in processed_ids or []:
         k = (emp or "").strip()
         if not k or k.startswith("NOMBRE::"):
             continue
-        if not (cfg.empleado_a_grupo or {}).get(k):
+        if not grupo_de(k):
             out[k] = "SIN_GRUPO"
-            continue
-        if not (cfg.empleado_a_idgrupo or {}).get(k):
+        elif not idgrupo_de(k):
             out[k] = "SIN_IDGRUPO"
-            continue
     return out
 
 def _print_groups(cfg: AppConfig) -> None:
-    print("\nGrupos disponibles (orden):")
+    meta = cfg.grupos_meta or {}
+    out = ["\nGrupos disponibles (orden):"]
     for i, g in enumerate(cfg.grupos_orden or [], start=1):
-        pref = (cfg.grupos_meta or {}).get(g, {}).get("prefijo", g)
-        print(f"  {i:>2}) {g}  (prefijo={pref})")
+        pref = meta.get(g, {}).get("prefijo", g)
+        out.append(f"  {i:>2}) {g}  (prefijo={pref})")
+    print("\n".join(out))
 
 def _select_group(cfg: AppConfig) -> str:
     _print_groups(cfg)
@@ -114,13 +149,15 @@ def _select_employee(processed_ids: Iterable[str], cfg: AppConfig) -> str:
     ids = sorted(set(ids), key=lambda x: x)
     if not ids:
         return ""
-    print("\nEmpleados detectados (ID):")
+    empleados = cfg.empleados()
+    vacio = EmpleadoRec()
+    # listado armado en memoria y emitido con un solo print (una escritura, no N)
+    out = ["\nEmpleados detectados (ID):"]
     for i, emp in enumerate(ids, start=1):
-        g = (cfg.empleado_a_grupo or {}).get(emp, "")
-        ig = (cfg.empleado_a_idgrupo or {}).get(emp, "")
-        st = (cfg.empleado_status or {}).get(emp, {}).get("activo", True)
-        st_txt = "ACTIVO" if bool(st) else "BAJA"
-        print(f"  {i:>3}) {emp} | grp={g or '-'} | idgrupo={ig or '-'} | {st_txt}")
+        rec = empleados.get(emp, vacio)
+        st_txt = "ACTIVO" if rec.activo else "BAJA"
+        out.append(f"  {i:>3}) {emp} | grp={rec.grupo or '-'} | idgrupo={rec.idgrupo or '-'} | {st_txt}")
+    print("\n".join(out))
     sel = _safe_input("Selecciona número (Enter cancela): ", "")
     if not sel:
         return ""
@@ -140,9 +177,7 @@ def _bulk_assign_missing(processed_ids: Iterable[str], cfg: AppConfig, script_di
     if not missing:
         print("\nNo hay empleados sin mapeo (grupo/IDGRUPO).")
         return
-    print("\nEmpleados SIN mapa (grupo/IDGRUPO):")
-    for emp, reason in missing.items():
-        print(f" - {emp} ({reason})")
+    print("\n".join(["\nEmpleados SIN mapa (grupo/IDGRUPO):"] + [f" - {emp} ({reason})" for emp, reason in missing.items()]))
 
     print("\nOpciones de asignación:")
     print(" 1) Asignar 1 por 1")
@@ -153,18 +188,23 @@ def _bulk_assign_missing(processed_ids: Iterable[str], cfg: AppConfig, script_di
         g = _select_group(cfg)
         pref = cfg.prefijo_de_grupo(g)
         motivo = _safe_input("Motivo (opcional): ", "")
-        for emp in list(missing.keys()):
-            cfg.empleado_a_grupo[emp] = g
-            cfg.empleado_a_idgrupo[emp] = _suggest_idgrupo(emp, cfg)
-            cfg.empleado_status.setdefault(emp, {"activo": True})
-            _audit_cfg(
-                script_dir=script_dir,
-                cfg=cfg,
-                usuario=usuario,
-                accion="MAPA_BULK_SET",
-                detalle={"emp_id": emp, "grupo": g, "idgrupo": cfg.empleado_a_idgrupo.get(emp, ""), "prefijo": pref},
-                motivo=motivo,
-            )
+        try:
+            for emp in list(missing.keys()):
+                cfg.empleado_a_grupo[emp] = g
+                # == _suggest_idgrupo(emp, cfg): faltantes nunca son vacíos ni NOMBRE::
+                cfg.empleado_a_idgrupo[emp] = f"{pref}-{emp}"
+                cfg.empleado_status.setdefault(emp, {"activo": True})
+                _audit_cfg(
+                    script_dir=script_dir,
+                    cfg=cfg,
+                    usuario=usuario,
+                    accion="MAPA_BULK_SET",
+                    detalle={"emp_id": emp, "grupo": g, "idgrupo": cfg.empleado_a_idgrupo[emp], "prefijo": pref},
+                    motivo=motivo,
+                    diferido=True,
+                )
+        finally:
+            _flush_audit()
         print(f"\nAsignado grupo '{g}' a {len(missing)} empleado(s).")
         return
 
@@ -297,15 +337,40 @@ def run_group_admin(
     usuario: str,
 ) -> None:
     """Ejecuta menú de administración y guarda config al salir (best-effort)."""
+    global _en_menu
     script_dir = Path(script_dir)
+    _en_menu = True
+    try:
+        _run_group_admin_loop(script_dir=script_dir, cfg=cfg, processed_ids=processed_ids, usuario=usuario)
+    finally:
+        # nada pendiente se pierde aunque el menú termine por excepción
+        try:
+            _flush_audit()
+        finally:
+            _en_menu = False
+        _esperar_auditoria()
+
+def _run_group_admin_loop(
+    *,
+    script_dir: Path,
+    cfg: AppConfig,
+    processed_ids: Iterable[str],
+    usuario: str,
+) -> None:
+    # processed_ids no cambia durante el menú: se deduplica una vez (también sirve si
+    # llega como generador). Los faltantes solo se recalculan tras una operación que
+    # modifica grupo/IDGRUPO (1-4); redibujar o cambiar estatus no los altera.
+    processed_ids = list(dict.fromkeys(processed_ids or []))
+    unique_proc = set(
+        str(x).strip()
+        for x in processed_ids
+        if str(x).strip() and not str(x).startswith("NOMBRE::")
+    )
+    missing: Optional[Dict[str, str]] = None
     while True:
-        missing = _list_missing(processed_ids, cfg)
+        if missing is None:
+            missing = _list_missing(processed_ids, cfg)
         total_mapped = len(cfg.empleado_a_grupo or {})
-        unique_proc = set(
-            str(x).strip()
-            for x in processed_ids or []
-            if str(x).strip() and not str(x).startswith("NOMBRE::")
-        )
         print("\n" + "="*90)
         print("ADMIN GRUPOS / IDGRUPO / ACTIVOS")
         print(f"Empleados procesados: {len(unique_proc)} | En mapa: {total_mapped} | Sin mapa: {len(missing)}")
@@ -336,20 +401,27 @@ def run_group_admin(
             continue
         if op == "1":
             _bulk_assign_missing(processed_ids, cfg, script_dir, usuario)
+            missing = None
             continue
         if op == "2":
             _move_employee(processed_ids, cfg, script_dir, usuario)
+            missing = None
             continue
         if op == "3":
             _delete_employee(processed_ids, cfg, script_dir, usuario)
+            missing = None
             continue
         if op == "4":
             _delete_group(cfg, script_dir, usuario)
+            missing = None
             continue
         if op == "5":
             _toggle_status(processed_ids, cfg, script_dir, usuario)
             continue
         if op == "7":
+            # la auditoría queda en disco (o falla) antes de guardar el mapa
+            _flush_audit()
+            _esperar_auditoria()
             guardar_config(script_dir, cfg)
             print("Config guardada.")
             return
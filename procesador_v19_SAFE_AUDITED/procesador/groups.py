@@ -4,9 +4,11 @@ from __future__ import annotations
 
 import re
 
-from typing import Dict, Optional, Tuple
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
 
 from .utils import normalize_id
@@ -33,6 +35,36 @@ def _grupo_sort_key(emp_id: str, cfg: AppConfig) -> Tuple[int, str]:
     return idx, emp_id
 
 
+def _grupo_idx(ids: pd.Series, cfg: AppConfig) -> pd.Series:
+    """Versión vectorizada de ``_grupo_sort_key(str(x), cfg)[0]`` para una columna de IDs.
+
+    Grupo vía ``map`` y posición vía ``Index.get_indexer`` (ambos por hash): sin
+    ``list.index`` por fila.
+    """
+    grupos = ids.astype(str).fillna("nan").map(cfg.empleado_a_grupo or {}).fillna("")
+    return _orden_idx(grupos, cfg)
+
+
+def _orden_por_grupo(grp_idx: pd.Series, llave: pd.Series) -> np.ndarray:
+    """Permutación estable por (índice de grupo, llave) para usar con ``take``.
+
+    Solo se ordena un frame de 2 columnas; las columnas del DF se copian una vez.
+    (``np.lexsort`` sobre las llaves como texto resultó más lento que
+    ``sort_values``, que factoriza internamente, y cambiaría el orden de IDs
+    numéricos.)
+    """
+    llaves = pd.DataFrame({"g": grp_idx.to_numpy(), "k": llave.reset_index(drop=True)})
+    return llaves.sort_values(by=["g", "k"], kind="stable").index.to_numpy()
+
+
+def _orden_idx(grupos: pd.Series, cfg: AppConfig) -> pd.Series:
+    # categorías únicas conservando la primera aparición (mismo orden relativo que .index())
+    cats = list(dict.fromkeys(cfg.grupos_orden or []))
+    codes = pd.Index(cats, dtype=object).get_indexer(grupos.astype(object)).astype("int64")
+    codes[codes < 0] = 9999
+    return pd.Series(codes, index=grupos.index)
+
+
 def aplicar_grupos_y_idgrupo(df: pd.DataFrame, cols: Dict[str, str], cfg: AppConfig, *, permitir_interactivo: bool) -> Tuple[pd.DataFrame, pd.DataFrame]:
     """
     Devuelve (df_procesado, df_idgrupo).
@@ -42,51 +74,71 @@ def aplicar_grupos_y_idgrupo(df: pd.DataFrame, cols: Dict[str, str], cfg: AppCon
     col_id = cols["id"]
     col_nombre = cols["nombre"]
 
-    # Actualizar meta (nombre) y estado default (activo) para IDs detectados
+    # Actualizar meta (nombre) y estado default (activo) para IDs detectados.
+    # Todo el filtrado es vectorizado; en Python solo se recorren los IDs únicos.
     try:
         meta = getattr(cfg, "empleado_meta", None)
         status = getattr(cfg, "empleado_status", None)
         if isinstance(meta, dict):
-            # usa el primer nombre visto por ID
             if col_nombre in df.columns:
-                for _id, _nm in df[[col_id, col_nombre]].dropna().drop_duplicates().itertuples(index=False, name=None):
-                    k = str(_id).strip()
-                    if not k:
-                        continue
+                # usa el primer nombre (no vacío) visto por ID
+                sub = df[[col_id, col_nombre]].dropna()
+                keys = sub[col_id].astype(str).str.strip()
+                nms = sub[col_nombre].astype(str).str.strip()
+                ok = keys.ne("")
+                for k in keys[ok].drop_duplicates():
                     meta.setdefault(k, {})
-                    if _nm and not meta[k].get("nombre"):
-                        meta[k]["nombre"] = str(_nm).strip()
+                firsts = pd.DataFrame({"k": keys, "nm": nms})[ok & nms.ne("")].drop_duplicates("k")
+                for k, nm in zip(firsts["k"], firsts["nm"]):
+                    m = meta[k]
+                    if not m.get("nombre"):
+                        m["nombre"] = nm
             else:
-                for _id in df[[col_id]].dropna().drop_duplicates().itertuples(index=False, name=None):
-                    k = str(_id).strip()
-                    if k:
-                        meta.setdefault(k, {})
+                keys = df[col_id].dropna().astype(str).str.strip()
+                for k in keys[keys.ne("")].drop_duplicates():
+                    meta.setdefault(k, {})
         if isinstance(status, dict):
-            for _id in df[[col_id]].dropna().drop_duplicates().itertuples(index=False, name=None):
-                k = str(_id).strip()
-                if not k or k.startswith("NOMBRE::"):
-                    continue
+            keys = df[col_id].dropna().astype(str).str.strip()
+            keys = keys[keys.ne("") & ~keys.str.startswith("NOMBRE::")].drop_duplicates()
+            for k in keys:
                 status.setdefault(k, {"activo": True})
     except Exception:
         pass
 
-    # Asegurar asignación: si falta grupo/idgrupo y está permitido, pedirlo
-    ids = df[col_id].fillna("").astype(str).tolist()
+    # Asegurar asignación: si falta grupo/idgrupo y está permitido, pedirlo. Se trabaja
+    # sobre los IDs únicos (orden de aparición): las filas repetidas no cambian nada.
+    ids = list(dict.fromkeys(df[col_id].fillna("").astype(str).tolist()))
+    _asignar_sin_id(ids, cfg)
+    if permitir_interactivo:
+        _pedir_asignaciones(_ids_sin_mapa(ids, cfg), cfg)
+    return _construir_salidas(df, col_id, cfg)
+
+
+def _asignar_sin_id(ids: List[str], cfg: AppConfig) -> None:
+    """Caso SIN ID (clave interna NOMBRE::...), sin captura interactiva.
+
+    - Asigna grupo interno SIN_ID solo para ordenar al final
+    - Mantiene IDGRUPO vacío para que NO afecte reportes por IDGRUPO
+    """
     for emp in ids:
-        if not emp:
-            continue
-        # Caso SIN ID (clave interna NOMBRE::...):
-        # - No forzar captura interactiva
-        # - Asignar grupo interno SIN_ID solo para ordenar al final
-        # - Mantener IDGRUPO vacío para que NO afecte reportes por IDGRUPO
-        if str(emp).startswith("NOMBRE::"):
-            if emp not in cfg.empleado_a_grupo:
-                cfg.empleado_a_grupo[emp] = "SIN_ID"
-            # no asignar IDGRUPO
-            if emp not in cfg.empleado_a_idgrupo:
-                cfg.empleado_a_idgrupo[emp] = ""
-            continue
-        if emp not in cfg.empleado_a_grupo and permitir_interactivo:
+        if emp.startswith("NOMBRE::"):
+            cfg.empleado_a_grupo.setdefault(emp, "SIN_ID")
+            cfg.empleado_a_idgrupo.setdefault(emp, "")
+
+
+def _ids_sin_mapa(ids: List[str], cfg: AppConfig) -> List[str]:
+    """IDs reales (no NOMBRE::) a los que les falta grupo o IDGRUPO, en orden."""
+    return [
+        emp for emp in ids
+        if emp and not emp.startswith("NOMBRE::")
+        and (emp not in cfg.empleado_a_grupo or emp not in cfg.empleado_a_idgrupo)
+    ]
+
+
+def _pedir_asignaciones(pendientes: List[str], cfg: AppConfig) -> None:
+    """Captura interactiva de grupo/IDGRUPO para los IDs pendientes."""
+    for emp in pendientes:
+        if emp not in cfg.empleado_a_grupo:
             print(f"\nEmpleado nuevo detectado: ID={emp}.")
             print("Grupos disponibles (en orden): " + " | ".join(cfg.grupos_orden))
             # Selección de grupo con validación (evita teclear algo accidental)
@@ -106,32 +158,29 @@ def aplicar_grupos_y_idgrupo(df: pd.DataFrame, cols: Dict[str, str], cfg: AppCon
                         cfg.grupos_meta[g_in] = {"prefijo": g_in}
                     cfg.empleado_a_grupo[emp] = g_in
                     break
-        if emp not in cfg.empleado_a_idgrupo and permitir_interactivo:
-            # Si es un empleado SIN ID (clave NOMBRE::), no generamos IDGRUPO automático.
-            if str(emp).startswith("NOMBRE::"):
-                cfg.empleado_a_idgrupo[emp] = ""
-            else:
-                g = cfg.empleado_a_grupo.get(emp, cfg.grupos_orden[0])
-                pref = cfg.prefijo_de_grupo(g)
-                sugerido = f"{pref}-{emp}"
-                nuevo = _safe_input(f"IDGRUPO para ID={emp} (Enter para usar '{sugerido}'): ", "").strip()
-                cfg.empleado_a_idgrupo[emp] = nuevo if nuevo else sugerido
-    # Construir columnas calculadas (sin mostrar grupo/prefijo según requerimiento)
-    df2 = df.copy()
-    df2["_grp_idx"] = df2[col_id].map(lambda x: _grupo_sort_key(str(x), cfg)[0])
-    df2["_grp_idgrupo"] = df2[col_id].map(lambda x: cfg.empleado_a_idgrupo.get(str(x), ""))
+        if emp not in cfg.empleado_a_idgrupo:
+            g = cfg.empleado_a_grupo.get(emp, cfg.grupos_orden[0])
+            pref = cfg.prefijo_de_grupo(g)
+            sugerido = f"{pref}-{emp}"
+            nuevo = _safe_input(f"IDGRUPO para ID={emp} (Enter para usar '{sugerido}'): ", "").strip()
+            cfg.empleado_a_idgrupo[emp] = nuevo if nuevo else sugerido
+
+
+def _construir_salidas(df: pd.DataFrame, col_id: str, cfg: AppConfig) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """(df_procesado, df_idgrupo) ordenados por grupo; sin E/S ni cambios en cfg."""
+    # Construir columnas calculadas (sin mostrar grupo/prefijo según requerimiento).
     # Orden por grupo y luego por ID (estable)
-    df2 = df2.sort_values(by=["_grp_idx", col_id], kind="stable").reset_index(drop=True)
-    # df_idgrupo: reemplaza ID por IDGRUPO visible
-    df_idgrupo = df2.copy()
-    df_idgrupo.insert(0, "IDGRUPO", df_idgrupo["_grp_idgrupo"])
-    # En archivo _IDGRUPO solo se conserva la columna IDGRUPO (se elimina el ID original)
-    df_idgrupo = df_idgrupo.drop(columns=[col_id], errors="ignore")
-    # quitar columnas internas
-    df_idgrupo = df_idgrupo.drop(columns=["_grp_idx", "_grp_idgrupo"], errors="ignore")
-    # df_procesado: mantiene ID original, pero mismo orden de df2
-    df_procesado = df2.drop(columns=["_grp_idx", "_grp_idgrupo"], errors="ignore")
-    # Guardar config si hubo cambios
+    orden = _orden_por_grupo(_grupo_idx(df[col_id], cfg), df[col_id])
+    # df_procesado: mantiene ID original, ordenado por grupo
+    df_procesado = df.take(orden).reset_index(drop=True)
+    # df_idgrupo: reemplaza ID por IDGRUPO visible. En archivo _IDGRUPO solo se conserva
+    # la columna IDGRUPO (se elimina el ID original); comparte las demás columnas.
+    df_idgrupo = df_procesado.drop(columns=[col_id], errors="ignore")
+    # mismo criterio que _grupo_idx: llave str(x) (NaN -> "nan"), join por hash contra el mapa
+    # (se reconstruye desde lista para inferir el mismo dtype que el map por fila)
+    ids = df_procesado[col_id].astype(str).fillna("nan")
+    idgrupo = ids.map(cfg.empleado_a_idgrupo or {}).fillna("")
+    df_idgrupo.insert(0, "IDGRUPO", pd.Series(idgrupo.tolist(), index=ids.index))
     return df_procesado, df_idgrupo
 
 
@@ -168,6 +217,30 @@ from typing import Callable
 import pandas as pd
 
 
+def idgrupo_labels(
+    ids: pd.Series,
+    cfg: AppConfig,
+    idgrupo_of: Callable[[object], str],
+) -> pd.Series:
+    """``build_idgrupo_label(idgrupo_of(x), x, cfg)`` para toda una columna de IDs.
+
+    Las hojas repiten cada ID por día/semana: la etiqueta se arma una vez por ID
+    único (``pd.factorize``). Solo para columnas de texto: factorize juntaría 3 y
+    3.0 (o None y NaN), que pueden dar etiquetas distintas; esos nulos se
+    etiquetan uno a uno.
+    """
+    if ids.empty or pd.api.types.infer_dtype(ids, skipna=True) != "string":
+        return ids.map(lambda x: build_idgrupo_label(idgrupo_of(x), x, cfg))
+    codes, uniq = pd.factorize(ids)
+    labels = np.asarray([build_idgrupo_label(idgrupo_of(x), x, cfg) for x in uniq], dtype=object)
+    out = np.empty(len(ids), dtype=object)
+    ok = codes >= 0
+    out[ok] = labels[codes[ok]]
+    if not ok.all():
+        out[~ok] = [build_idgrupo_label(idgrupo_of(x), x, cfg) for x in ids.to_numpy()[~ok]]
+    return pd.Series(out.tolist(), index=ids.index)
+
+
 def transform_sheet_procesado(df: pd.DataFrame) -> pd.DataFrame:
     """En _PROCESADO todas las hojas conservan ID original y NO llevan IDGRUPO."""
     return df.drop(columns=["IDGRUPO"], errors="ignore")
@@ -185,16 +258,9 @@ def transform_sheet_idgrupo(
     if "ID" not in df.columns:
         return df
 
-    df2 = df.copy()
-    if "IDGRUPO" in df2.columns:
-        df2 = df2.drop(columns=["IDGRUPO"], errors="ignore")
-
-    df2.insert(
-        0,
-        "IDGRUPO",
-        df2["ID"].map(lambda x: build_idgrupo_label(idgrupo_of(x), x, cfg)),
-    )
-    df2 = df2.drop(columns=["ID"], errors="ignore")
+    # drop() no copia datos (copy-on-write): solo se materializa la columna nueva
+    df2 = df.drop(columns=["IDGRUPO", "ID"], errors="ignore")
+    df2.insert(0, "IDGRUPO", idgrupo_labels(df["ID"], cfg, idgrupo_of))
     return df2
 
 
@@ -202,11 +268,27 @@ def _norm(s: object) -> str:
     return "" if s is None else str(s).strip().lower()
 
 def _is_digits(s: object) -> bool:
-    return bool(re.fullmatch(r"\d+", str(s).strip())) if s is not None else False
+    # isdecimal() == fullmatch(r"\d+") para str (ambos: dígitos Unicode Nd, no vacío)
+    return str(s).strip().isdecimal() if s is not None else False
+
+
+_LETRA_RE = re.compile(r"[A-Za-zÁÉÍÓÚÜÑáéíóúüñ]")
 
 
 def make_emp_key(id_val: object, nombre_val: object, cfg_id_width: int = 3) -> Tuple[str, str]:
     """Crea una clave interna estable por empleado y el ID visible.
+
+    Función pura: se memoiza por argumentos (las hojas repiten el mismo ID/nombre
+    en cada día); valores no hashables se calculan sin caché.
+    """
+    try:
+        return _make_emp_key_cached(id_val, nombre_val, cfg_id_width)
+    except TypeError:
+        return _make_emp_key(id_val, nombre_val, cfg_id_width)
+
+
+def _make_emp_key(id_val: object, nombre_val: object, cfg_id_width: int = 3) -> Tuple[str, str]:
+    """Crea una clave interna estable por empleado y el ID visible.
     Caso especial SIN ID:
       - En el export, a veces ID == Nombre (ej. 'María') y no es numérico.
       - Internamente usamos clave: 'NOMBRE::' para no perder trazabilidad.
@@ -215,27 +297,33 @@ def make_emp_key(id_val: object, nombre_val: object, cfg_id_width: int = 3) -> T
     """
     id_raw = _coerce_id_str(id_val, cfg_id_width)
     nombre_raw = "" if nombre_val is None else str(nombre_val).strip()
-    if id_raw and nombre_raw and (_norm(id_raw) == _norm(nombre_raw)) and (not _is_digits(id_raw)):
+    if not id_raw or _is_digits(id_raw):
+        return id_raw, id_raw
+    if nombre_raw and _norm(id_raw) == _norm(nombre_raw):
         return f"NOMBRE::{_norm(nombre_raw)}", ""  # ID visible vacío
     # Si el ID no es numérico y parece nombre (contiene letras), úsalo como clave tipo NOMBRE::
     # Esto ayuda a que correcciones/plantilla coincidan si se captura 'María' como ID.
-    if id_raw and (not _is_digits(id_raw)) and re.search(r"[A-Za-zÁÉÍÓÚÜÑáéíóúüñ]", id_raw):
+    if _LETRA_RE.search(id_raw):
         return f"NOMBRE::{_norm(id_raw)}", ""
     return id_raw, id_raw
 
 
+# typed=True: 3 y 3.0 (o np.int64) no comparten entrada aunque sean iguales
+_make_emp_key_cached = lru_cache(maxsize=131072, typed=True)(_make_emp_key)
+
+
 def apply_id_display(df: Optional[pd.DataFrame], id_col: str = "ID") -> Optional[pd.DataFrame]:
     """Devuelve copia con ID visible en blanco para claves NOMBRE::"""
     if df is None:
         return None
     if id_col not in df.columns:
         return df
-    out = df.copy()
     try:
-        out[id_col] = out[id_col].astype(str).map(lambda x: "" if str(x).startswith("NOMBRE::") else str(x))
+        # astype(str) conserva NaN: str(NaN) == "nan" como en la versión por fila
+        ids = df[id_col].astype(str).fillna("nan")
+        return df.assign(**{id_col: ids.mask(ids.str.startswith("NOMBRE::"), "")})
     except Exception:
-        pass
-    return out
+        return df.copy()
 
 
 
@@ -247,21 +335,12 @@ def sort_df_by_group(df: pd.DataFrame, cfg: AppConfig, *, id_col: str = 'ID', id
     """
     if df is None or len(df)==0:
         return df
-    df2 = df.copy()
-    if id_col in df2.columns:
-        df2['_grp_idx'] = df2[id_col].astype(str).map(lambda x: _grupo_sort_key(str(x), cfg)[0])
-        df2 = df2.sort_values(by=['_grp_idx', id_col], kind='stable').drop(columns=['_grp_idx']).reset_index(drop=True)
-        return df2
-    if idgrupo_col in df2.columns:
+    if id_col in df.columns:
+        orden = _orden_por_grupo(_grupo_idx(df[id_col], cfg), df[id_col])
+        return df.take(orden).reset_index(drop=True)
+    if idgrupo_col in df.columns:
         sep = getattr(cfg, 'idgrupo_sep', '-') or '-'
-        def _idx(v: object) -> int:
-            s = '' if v is None else str(v).strip()
-            code = s.split(sep,1)[0] if sep in s else s
-            try:
-                return cfg.grupos_orden.index(code)
-            except Exception:
-                return 9999
-        df2['_grp_idx'] = df2[idgrupo_col].map(_idx)
-        df2 = df2.sort_values(by=['_grp_idx', idgrupo_col], kind='stable').drop(columns=['_grp_idx']).reset_index(drop=True)
-        return df2
+        codes = df[idgrupo_col].astype(str).fillna('').str.strip().str.split(sep, n=1, regex=False).str[0]
+        orden = _orden_por_grupo(_orden_idx(codes, cfg), df[idgrupo_col])
+        return df.take(orden).reset_index(drop=True)
     return df
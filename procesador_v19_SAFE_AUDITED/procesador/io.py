@@ -14,7 +14,6 @@ import re as _re
 from .logger import log_exception
 from .utils import chmod_restringido, normalize_id
 import logging
-import re
 from .config import AppConfig
 from .groups import sort_df_by_group
 
@@ -196,22 +195,21 @@ def exportar_excel(df: pd.DataFrame, out_path: Path, extra_sheets: dict = None,
     extra_sheets = extra_sheets or {}
     cfg = cfg or AppConfig()
 
+    # Los mismos encabezados se repiten entre hojas: memo por exportación
+    # (cfg no cambia durante el export).
+    width_cache: dict = {}
+
     def _expected_width(header: object) -> float:
         h = "" if header is None else str(header)
-        # exact match
-        if h in (cfg.column_widths or {}):
-            return float(cfg.column_widths[h])
-        # patterns
-        for item in (cfg.column_width_patterns or []):
-            try:
-                pat = str(item.get("pattern", ""))
-                w = float(item.get("width", 0) or 0)
-                if pat and re.search(pat, h):
-                    return float(w)
-            except Exception:
-                continue
-        # fallback by header length
-        return float(min(45, max(10, len(h) + 2)))
+        w = width_cache.get(h)
+        if w is None:
+            # exact match / patterns (precompilados)
+            w = cfg.column_width(h)
+            if w is None:
+                # fallback by header length
+                w = float(min(45, max(10, len(h) + 2)))
+            width_cache[h] = w
+        return w
 
     with pd.ExcelWriter(out_path, engine="openpyxl") as writer:
         _sanitize_excel_injection(_drop_export_debug_cols(_sort_for_group_order_export(df, cfg))).to_excel(writer, index=False, sheet_name="Reporte")
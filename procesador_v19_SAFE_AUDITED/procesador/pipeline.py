@@ -37,7 +37,7 @@ from .parsers import parse_date, parse_registro, parse_time
 from .core import normalize_registro_times, map_eventos, calcular_trabajado, minutos_entre
 from .io import exportar_excel, backup_if_exists
 from .faltas import cargar_plantilla_empleados, calcular_faltas
-from .groups import aplicar_grupos_y_idgrupo, build_idgrupo_label, transform_sheet_procesado, transform_sheet_idgrupo, make_emp_key, apply_id_display, _grupo_sort_key
+from .groups import aplicar_grupos_y_idgrupo, idgrupo_labels, transform_sheet_procesado, transform_sheet_idgrupo, make_emp_key, apply_id_display, _grupo_idx
 from .summaries import (
     construir_resumen_semanal,
     construir_resumen_mensual,
@@ -1288,7 +1288,7 @@ def procesar_archivo(
         df_out["Nota ajuste"] = notas_flags
     # Aplicar orden por grupos usando el ID original (columna "ID" en df_out)
     # Creamos DF temporal para ordenar con cfg.empleado_a_grupo.
-    df_out["_grp_idx"] = df_out["ID"].map(lambda x: _grupo_sort_key(str(x), cfg)[0])
+    df_out["_grp_idx"] = _grupo_idx(df_out["ID"], cfg)
     df_out = df_out.sort_values(by=["_grp_idx", "ID"], kind="stable").drop(columns=["_grp_idx"]).reset_index(drop=True)
     # IDGRUPO: agregar columna al inicio según mapping manual
     
@@ -1332,7 +1332,7 @@ def procesar_archivo(
     # Asegurar columna IDGRUPO al inicio (sin duplicarla)
     if "IDGRUPO" in df_idgrupo.columns:
         df_idgrupo = df_idgrupo.drop(columns=["IDGRUPO"])
-    df_idgrupo.insert(0, "IDGRUPO", df_idgrupo["ID"].map(lambda x: build_idgrupo_label(_idgrupo_of(x), x, cfg)))
+    df_idgrupo.insert(0, "IDGRUPO", idgrupo_labels(df_idgrupo["ID"], cfg, _idgrupo_of))
     # En _IDGRUPO NO se conserva la columna ID original (control por archivo)
     df_idgrupo = df_idgrupo.drop(columns=["ID"], errors="ignore")
 
@@ -14,7 +14,7 @@ from typing import Dict, List, Optional, Tuple
 import pandas as pd
 
 from .utils import hhmm_to_minutes, minutes_to_hhmm, rango_semana, _week_key, _month_key, _dia_abrev_es
-from .groups import _grupo_sort_key
+from .groups import _grupo_idx
 from .config import AppConfig
 
 def construir_resumen_semanal(df_out: pd.DataFrame, cfg, faltas_semanal: pd.DataFrame = None) -> pd.DataFrame:
@@ -111,7 +111,7 @@ def construir_resumen_semanal(df_out: pd.DataFrame, cfg, faltas_semanal: pd.Data
         if c not in out.columns:
             out[c] = "" if c in dias_orden or c == "Rango semana" else 0
     out = out[fixed_cols]
-    out["_grp_idx"] = out["ID"].map(lambda x: _grupo_sort_key(str(x), cfg)[0])
+    out["_grp_idx"] = _grupo_idx(out["ID"], cfg)
     out = out.sort_values(by=["_grp_idx", "ID", "Semana"], kind="stable").drop(columns=["_grp_idx"]).reset_index(drop=True)
     return out
 
@@ -147,7 +147,7 @@ def construir_resumen_mensual(df_out: pd.DataFrame, cfg, faltas_mensual: pd.Data
     if "Faltas" not in g.columns:
         g["Faltas"]=0
     g["Faltas"] = pd.to_numeric(g["Faltas"], errors="coerce").fillna(0).astype(int)
-    g["_grp_idx"] = g["ID"].map(lambda x: _grupo_sort_key(str(x), cfg)[0])
+    g["_grp_idx"] = _grupo_idx(g["ID"], cfg)
     g = g.sort_values(by=["_grp_idx","ID","Mes"], kind="stable").drop(columns=["_grp_idx"]).reset_index(drop=True)
     return g
 
@@ -181,7 +181,7 @@ def construir_resumen_semanal_vertical(df_out: pd.DataFrame, cfg, faltas_semanal
     if "Faltas" not in g.columns:
         g["Faltas"]=0
     g["Faltas"] = pd.to_numeric(g["Faltas"], errors="coerce").fillna(0).astype(int)
-    g["_grp_idx"] = g["ID"].map(lambda x: _grupo_sort_key(str(x), cfg)[0])
+    g["_grp_idx"] = _grupo_idx(g["ID"], cfg)
     g = g.sort_values(by=["_grp_idx","ID","Semana"], kind="stable").drop(columns=["_grp_idx"]).reset_index(drop=True)
     # Agregar rango real de la semana (según cfg.week_start_dow)
     try:
@@ -10,11 +10,14 @@ import shutil
 import tempfile
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import List, Optional
+from typing import TYPE_CHECKING, List, Optional, Tuple
 import hashlib
 import hmac
 import secrets
 
+if TYPE_CHECKING:
+    from .config import AppConfig
+
 def safe_str(v: object) -> str:
     """Convierte a string seguro (None -> '')."""
     return "" if v is None else str(v)
@@ -128,16 +131,20 @@ def rango_semana(fecha: pd.Timestamp, week_start_dow: int) -> str:
     return f"{inicio.strftime('%Y-%m-%d')} a {fin.strftime('%Y-%m-%d')}"
 
 
+def _week_start_dow(cfg: AppConfig) -> int:
+    try:
+        dow = int(getattr(cfg, "week_start_dow", 0) or 0)
+    except Exception:
+        dow = 0
+    return dow % 7
+
+
 def _week_key(d: pd.Timestamp, cfg: AppConfig) -> str:
     """Clave de semana según el inicio configurado (week_start_dow).
     - 0=Lunes (ISO), 2=Miércoles, etc.
     Devuelve una clave estable tipo: YYYY-WK-YYYYMMDD (fecha de inicio de semana).
     """
-    try:
-        dow = int(getattr(cfg, "week_start_dow", 0) or 0)
-    except Exception:
-        dow = 0
-    dow = dow % 7
+    dow = _week_start_dow(cfg)
     # pandas Timestamp -> datetime.date
     ts = pd.to_datetime(d, errors="coerce")
     if pd.isna(ts):
@@ -152,6 +159,14 @@ def _month_key(d: pd.Timestamp) -> str:
     return f"{d.year:04d}-{d.month:02d}"
 
 
+def _week_month_keys(fechas: pd.DatetimeIndex, cfg: AppConfig) -> Tuple[pd.Index, pd.Index]:
+    """_week_key/_month_key para un índice de fechas sin NaT, en una sola pasada vectorizada."""
+    fechas = pd.DatetimeIndex(fechas).normalize()
+    delta = (fechas.weekday - _week_start_dow(cfg)) % 7
+    inicio = fechas - pd.to_timedelta(delta, unit="D")
+    return inicio.strftime("%Y-WK-%Y%m%d"), fechas.strftime("%Y-%m")
+
+
 def _norm(s: object) -> str:
     return "" if s is None else str(s).strip().lower()
 
@@ -281,10 +296,19 @@ def get_or_create_audit_key(
     kid = hashlib.sha256(bytes.fromhex(key_hex)).hexdigest()[:8]
     return key_hex, kid
 
+# HMAC ya inicializado por llave (hex): se copia por firma para no rehacer el key schedule.
+_HMAC_TEMPLATES: dict[str, "hmac.HMAC"] = {}
+
+
 def hmac_sha256_hex(key_hex: str, payload: bytes) -> str:
-    """Firma payload con HMAC-SHA256 y devuelve hex."""
-    key = bytes.fromhex((key_hex or "").strip())
-    return hmac.new(key, payload, hashlib.sha256).hexdigest()
+    """Firma payload con HMAC-SHA256 (OpenSSL vía hashlib) y devuelve hex."""
+    key_hex = (key_hex or "").strip()
+    tmpl = _HMAC_TEMPLATES.get(key_hex)
+    if tmpl is None:
+        tmpl = _HMAC_TEMPLATES[key_hex] = hmac.new(bytes.fromhex(key_hex), digestmod=hashlib.sha256)
+    h = tmpl.copy()
+    h.update(payload)
+    return h.hexdigest()
 
 
 def verify_hmac_sha256_hex(key_hex: str, payload: bytes, signature_hex: str) -> bool:
@@ -119,3 +119,66 @@ def test_list_missing_detects_no_idgrupo():
     missing = _list_missing(["001"], cfg)
     assert "001" in missing
     assert missing["001"] == "SIN_IDGRUPO"
+
+
+def test_bulk_assign_writes_audit_batch_once(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    """Bulk assignment must queue one record per employee and write them in a single batch."""
+    import procesador.group_admin as ga
+
+    cfg = _make_cfg(tmp_path)
+    calls = []
+    real_log_many = ga.log_many
+
+    def _spy(**kw):
+        kw["records"] = list(kw["records"])
+        calls.append((len(kw["records"]), kw.get("background")))
+        return real_log_many(**kw)
+
+    monkeypatch.setattr(ga, "log_many", _spy)
+    # Flow: option 1, bulk (2), first group (Enter), motivo, exit (0)
+    inputs = iter(["1", "2", "", "alta masiva", "0"])
+    monkeypatch.setattr("builtins.input", lambda _prompt="": next(inputs))
+
+    run_group_admin(script_dir=tmp_path, cfg=cfg, processed_ids=["001", "002", "003"], usuario="TEST")
+
+    assert calls == [(3, True)]  # encolado al hilo de auditoría; se espera al salir
+    assert not ga._pending_audit and not ga._en_menu
+    lines = (tmp_path / "auditoria" / "auditoria_cambios.jsonl").read_text(encoding="utf-8").splitlines()
+    assert len(lines) == 3 and all("MAPA_BULK_SET" in ln for ln in lines)
+
+
+def test_admin_recomputes_missing_only_after_map_changes(tmp_path: Path, monkeypatch: pytest.MonkeyPatch, capsys):
+    """Redraws reuse the missing list; a map-changing option refreshes it."""
+    import procesador.group_admin as ga
+
+    cfg = _make_cfg(tmp_path)
+    calls = []
+    real = ga._list_missing
+    monkeypatch.setattr(ga, "_list_missing", lambda ids, c: calls.append(1) or real(ids, c))
+    # Flow: view groups twice (6), bulk assign (1, 2, first group, motivo), exit (0)
+    inputs = iter(["6", "6", "1", "2", "", "", "0"])
+    monkeypatch.setattr("builtins.input", lambda _prompt="": next(inputs))
+
+    run_group_admin(script_dir=tmp_path, cfg=cfg, processed_ids=iter(["001", "002", "001"]), usuario="TEST")
+
+    out = capsys.readouterr().out
+    assert "Empleados procesados: 2 | En mapa: 0 | Sin mapa: 2" in out
+    assert "En mapa: 2 | Sin mapa: 0" in out
+    assert len(calls) == 3  # inicial, dentro de la opción 1, tras la opción 1
+
+
+def test_admin_audit_failure_blocks_config_save(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    """A failed background audit write must raise before option 7 saves the map."""
+    import procesador.group_admin as ga
+
+    cfg = _make_cfg(tmp_path)
+    (tmp_path / "auditoria").write_text("x", encoding="utf-8")  # no se puede crear el directorio
+    # Flow: option 1, bulk (2), first group (Enter), motivo, save (7)
+    inputs = iter(["1", "2", "", "m", "7"])
+    monkeypatch.setattr("builtins.input", lambda _prompt="": next(inputs))
+
+    with pytest.raises(OSError):
+        run_group_admin(script_dir=tmp_path, cfg=cfg, processed_ids=["001"], usuario="TEST")
+
+    assert not ga._pending_audit and not ga._en_menu
+    assert "001" not in cargar_config(tmp_path).empleado_a_grupo
@@ -59,3 +59,56 @@ def test_audit_bundle_signed_and_verifiable(tmp_path: Path):
     cfg = cargar_config(script_dir)
 
     assert verificar_auditoria_bundle(bundle_path, script_dir=script_dir, cfg=cfg) is True
+
+
+def test_bundle_firmado_con_json_estandar_sigue_verificando(tmp_path: Path):
+    from procesador.config import AppConfig
+    from procesador.corrections import AuditEntry, guardar_auditoria_bundle
+    from procesador.utils import get_or_create_audit_key, hmac_sha256_hex
+
+    cfg = AppConfig()
+    cfg.audit_key_dir = str(tmp_path / "llaves")
+    entry = AuditEntry(
+        run_id="r1", emp_id="007", fecha="2026-01-30", usuario="QA", ts="2026-01-30T10:00:00",
+        accion="EDIT", campo="eventos.Entrada", antes="08:05", despues="08:00", motivo="Corrección ñ/á",
+    )
+    run_meta = {"run_id": "r1", "started_at": "2026-01-30T09:00:00", "usuario": "QA", "modo_seguro": True}
+    paths = guardar_auditoria_bundle(out_dir=tmp_path, script_dir=tmp_path, audit_log=[entry], run_meta=run_meta, cfg=cfg)
+    assert verificar_auditoria_bundle(paths["bundle"], script_dir=tmp_path, cfg=cfg) is True
+    raw = paths["bundle"].read_bytes()
+    assert raw == json.dumps(json.loads(raw), ensure_ascii=False, sort_keys=True, separators=(",", ":")).encode("utf-8")
+
+    # Bundle con float en meta firmado sobre json.dumps estándar (forma previa a orjson)
+    obj = json.loads(paths["bundle"].read_text(encoding="utf-8"))
+    obj["meta"]["ratio"] = 1e16
+    canon = json.dumps({"meta": obj["meta"], "entries": obj["entries"]}, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    key_hex, _kid = get_or_create_audit_key(tmp_path, filename=cfg.audit_key_filename, key_dir=Path(cfg.audit_key_dir))
+    obj["signature"] = hmac_sha256_hex(key_hex, canon.encode("utf-8"))
+    paths["bundle"].write_text(json.dumps(obj, ensure_ascii=False, indent=2), encoding="utf-8")
+    assert verificar_auditoria_bundle(paths["bundle"], script_dir=tmp_path, cfg=cfg) is True
+
+    obj["meta"]["usuario"] = "OTRO"
+    paths["bundle"].write_text(json.dumps(obj, ensure_ascii=False, indent=2), encoding="utf-8")
+    assert verificar_auditoria_bundle(paths["bundle"], script_dir=tmp_path, cfg=cfg) is False
+
+
+def test_bundle_sin_ediciones_se_firma_y_llave_nueva_se_relee(tmp_path: Path):
+    import os
+
+    from procesador.config import AppConfig
+    from procesador.corrections import guardar_auditoria_bundle
+
+    cfg = AppConfig()
+    cfg.audit_key_dir = str(tmp_path / "llaves")
+    run_meta = {"run_id": "r0", "started_at": "2026-01-30T09:00:00", "input_sha256": "ab" * 32}
+    paths = guardar_auditoria_bundle(out_dir=tmp_path, script_dir=tmp_path, audit_log=[], run_meta=run_meta, cfg=cfg)
+    obj = json.loads(paths["bundle"].read_text(encoding="utf-8"))
+    assert obj["signature_algo"] == "HMAC-SHA256" and obj["signature"]
+    assert verificar_auditoria_bundle(paths["bundle"], script_dir=tmp_path, cfg=cfg) is True
+
+    # Reemplazar la llave en disco invalida la llave cacheada
+    key_path = Path(cfg.audit_key_dir) / cfg.audit_key_filename
+    key_path.write_text("cd" * 32, encoding="utf-8")
+    st = key_path.stat()
+    os.utime(key_path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    assert verificar_auditoria_bundle(paths["bundle"], script_dir=tmp_path, cfg=cfg) is False
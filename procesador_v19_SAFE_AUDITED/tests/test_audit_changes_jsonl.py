@@ -2,6 +2,8 @@ import json
 from datetime import datetime
 from pathlib import Path
 
+import pytest
+
 from procesador.config import AppConfig
 from procesador.corrections import AuditEntry, guardar_auditoria_bundle
 
@@ -67,3 +69,42 @@ def test_guardar_auditoria_bundle_escribe_auditoria_cambios_jsonl(tmp_path: Path
     objs = [json.loads(x) for x in lines[-2:]]
     assert objs[0]["accion"] == "EDIT"
     assert objs[1]["accion"] == "INSERT"
+
+
+def test_indice_rota_sin_perder_lineas(tmp_path: Path):
+    cfg = AppConfig()
+    cfg.audit_signing_enabled = False
+    cfg.audit_rotate_max_bytes = 300  # ~1 línea de índice por archivo
+
+    out_dir = tmp_path / "salidas"
+    for i in range(5):
+        run_meta = {"run_id": f"r{i}", "started_at": "2026-01-30T10:00:00", "usuario": "QA"}
+        guardar_auditoria_bundle(out_dir=out_dir, script_dir=tmp_path, audit_log=[], run_meta=run_meta, cfg=cfg)
+
+    audit_dir = out_dir / cfg.audit_dir_name
+    stem = Path(cfg.audit_index_filename).stem
+    files = sorted(audit_dir.glob(f"{stem}*.jsonl"))
+    assert len(files) > 1, "Debe rotar el índice al exceder audit_rotate_max_bytes"
+    runs = sorted(json.loads(x)["run_id"] for f in files for x in f.read_text(encoding="utf-8").splitlines())
+    assert runs == [f"r{i}" for i in range(5)]
+
+
+def test_audit_fsync_sincroniza_indice_y_cambios(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    from procesador import audit
+
+    synced = []
+    monkeypatch.setattr(audit, "_datasync", synced.append)
+    cfg = AppConfig()
+    cfg.audit_signing_enabled = False
+    entry = AuditEntry(
+        run_id="r1", emp_id="001", fecha="2026-01-30", usuario="QA", ts="2026-01-30T10:00:00",
+        accion="EDIT", campo="Salida", antes="18:00", despues="18:05", motivo="Test",
+    )
+    run_meta = {"run_id": "r1", "started_at": "2026-01-30T10:00:00", "usuario": "QA"}
+
+    guardar_auditoria_bundle(out_dir=tmp_path, script_dir=tmp_path, audit_log=[entry], run_meta=run_meta, cfg=cfg)
+    assert synced == []
+
+    cfg.audit_fsync = True
+    guardar_auditoria_bundle(out_dir=tmp_path, script_dir=tmp_path, audit_log=[entry], run_meta=run_meta, cfg=cfg)
+    assert len(synced) == 2  # índice + auditoria_cambios.jsonl, un sync por archivo
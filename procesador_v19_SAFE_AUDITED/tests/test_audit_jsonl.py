@@ -6,7 +6,7 @@ from pathlib import Path
 
 import pytest
 
-from procesador.audit import log_change, make_sample_entries
+from procesador.audit import append_bytes, log_change, log_many, make_sample_entries
 from procesador.utils import get_or_create_audit_key, default_app_data_dir
 
 
@@ -21,6 +21,17 @@ def test_log_change_creates_jsonl(tmp_path: Path):
     assert obj["run_id"] == "sample_run_001"
 
 
+def test_log_many_appends_all_records(tmp_path: Path):
+    audit_dir = tmp_path / "auditoria"
+    recs = make_sample_entries()
+    log_change(audit_dir=audit_dir, record=recs[0], rotate_max_bytes=0)
+    p = log_many(audit_dir=audit_dir, records=recs, rotate_max_bytes=0)
+    assert p is not None
+    objs = [json.loads(x) for x in p.read_text(encoding="utf-8").splitlines()]
+    assert [o["accion"] for o in objs] == ["EDIT", "EDIT", "INSERT", "DELETE"]
+    assert log_many(audit_dir=audit_dir, records=[], rotate_max_bytes=0) is None
+
+
 @pytest.mark.skipif(os.name == "nt", reason="chmod semantics differ on Windows")
 def test_log_change_permissions_posix(tmp_path: Path):
     audit_dir = tmp_path / "auditoria"
@@ -40,3 +51,121 @@ def test_audit_key_not_in_code_dir(tmp_path: Path):
     # file should exist in app data dir
     data_dir = default_app_data_dir("procesador")
     assert (data_dir / "audit_key.txt").exists()
+
+
+def test_log_change_sanitizes_dirty_record(tmp_path: Path):
+    audit_dir = tmp_path / "auditoria"
+    rec = dict(make_sample_entries()[0], motivo="linea 1\r\nlinea\x00 2  ")
+    p = log_change(audit_dir=audit_dir, record=rec, rotate_max_bytes=0)
+    obj = json.loads(p.read_text(encoding="utf-8"))
+    assert obj["motivo"] == "linea 1 linea 2"
+    assert obj["campo"] == "Salida a comer"
+
+
+def test_log_change_rotates_and_reopens(tmp_path: Path):
+    audit_dir = tmp_path / "auditoria"
+    recs = make_sample_entries()
+    p = log_change(audit_dir=audit_dir, record=recs[0], rotate_max_bytes=10)
+    log_change(audit_dir=audit_dir, record=recs[1], rotate_max_bytes=10)
+    rotated = [x for x in audit_dir.glob("auditoria_cambios_*.jsonl")]
+    assert len(rotated) == 1
+    assert json.loads(rotated[0].read_text(encoding="utf-8"))["accion"] == "EDIT"
+    assert json.loads(p.read_text(encoding="utf-8"))["accion"] == "INSERT"
+
+
+def test_log_background_flush(tmp_path: Path):
+    from procesador.audit import flush_audit
+
+    audit_dir = tmp_path / "auditoria"
+    recs = make_sample_entries()
+    log_change(audit_dir=audit_dir, record=recs[0], background=True)
+    p = log_many(audit_dir=audit_dir, records=recs[1:], background=True)
+    flush_audit()
+    objs = [json.loads(x) for x in p.read_text(encoding="utf-8").splitlines()]
+    assert [o["accion"] for o in objs] == ["EDIT", "INSERT", "DELETE"]
+
+
+def test_log_background_flush_raises_write_error(tmp_path: Path):
+    from procesador.audit import flush_audit
+
+    bad = tmp_path / "auditoria"
+    bad.write_text("x", encoding="utf-8")
+    log_change(audit_dir=bad, record=make_sample_entries()[0], background=True)
+    with pytest.raises(OSError):
+        flush_audit()
+    flush_audit()  # el error se informa una sola vez
+
+
+def test_log_change_rotation_same_second_keeps_all(tmp_path: Path):
+    audit_dir = tmp_path / "auditoria"
+    recs = make_sample_entries()
+    for r in recs:
+        log_change(audit_dir=audit_dir, record=r, rotate_max_bytes=10)
+    files = sorted(audit_dir.glob("auditoria_cambios*.jsonl"))
+    acciones = sorted(json.loads(f.read_text(encoding="utf-8"))["accion"] for f in files)
+    assert acciones == ["DELETE", "EDIT", "INSERT"]
+
+
+def test_append_bytes_large_lines_intact(tmp_path: Path):
+    # líneas mayores a PIPE_BUF: se escriben completas bajo candado (POSIX)
+    p = tmp_path / "auditoria" / "idx.jsonl"
+    big = [json.dumps({"i": i, "pad": "x" * 10000}) + "\n" for i in range(3)]
+    for line in big:
+        append_bytes(p, line.encode("utf-8"))
+    assert p.read_text(encoding="utf-8") == "".join(big)
+
+
+def test_log_many_sync_single_datasync(tmp_path, monkeypatch):
+    import procesador.audit as audit
+
+    calls = []
+    monkeypatch.setattr(audit, "_datasync", lambda fd: calls.append(fd))
+    recs = [{"emp_id": str(i), "motivo": "lote"} for i in range(5)]
+    path = audit.log_many(audit_dir=tmp_path, records=recs, sync=True)
+    assert len(calls) == 1
+    assert len(path.read_text(encoding="utf-8").splitlines()) == 5
+    audit.log_many(audit_dir=tmp_path, records=recs)
+    assert len(calls) == 1
+
+
+def test_log_change_reopens_after_external_rename(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    from procesador import audit
+
+    monkeypatch.setattr(audit._WRITER, "_RECHECK_S", 0.0)  # verificar en cada escritura
+    p = log_change(audit_dir=tmp_path, record={"accion": "EDIT"})
+    archivado = tmp_path / "archivado.jsonl"
+    os.rename(p, archivado)  # otro proceso rota el archivo
+
+    log_change(audit_dir=tmp_path, record={"accion": "INSERT"})
+    assert p.exists()
+    assert json.loads(p.read_text(encoding="utf-8"))["accion"] == "INSERT"
+    assert len(archivado.read_text(encoding="utf-8").splitlines()) == 1
+
+
+def test_log_change_no_stat_per_write(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    from procesador import audit
+
+    monkeypatch.setattr(audit._WRITER, "_RECHECK_S", 3600.0)
+    p = log_change(audit_dir=tmp_path, record={"accion": "EDIT"})
+    stats = []
+    real_stat = os.stat
+    monkeypatch.setattr(os, "stat", lambda f, *a, **kw: stats.append(f) or real_stat(f, *a, **kw))
+    for _ in range(50):
+        log_change(audit_dir=tmp_path, record={"accion": "EDIT"})
+    assert [f for f in stats if Path(f) == p] == []
+    assert len(p.read_text(encoding="utf-8").splitlines()) == 51
+
+
+def test_rotation_limit_checks_external_rotation_first(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    """Al cruzar el límite, si otro proceso ya rotó no se rota el archivo nuevo."""
+    from procesador import audit
+
+    monkeypatch.setattr(audit._WRITER, "_RECHECK_S", 3600.0)
+    rec = {"accion": "EDIT", "motivo": "x" * 200}
+    p = log_change(audit_dir=tmp_path, record=rec, rotate_max_bytes=300)
+    log_change(audit_dir=tmp_path, record=rec, rotate_max_bytes=300)
+    os.rename(p, tmp_path / "rotado_por_otro.jsonl")
+
+    log_change(audit_dir=tmp_path, record=rec, rotate_max_bytes=300)
+    assert len(p.read_text(encoding="utf-8").splitlines()) == 1
+    assert sorted(x.name for x in tmp_path.iterdir()) == ["auditoria_cambios.jsonl", "rotado_por_otro.jsonl"]
@@ -1,7 +1,7 @@
 
 from datetime import time
 from procesador.config import AppConfig
-from procesador.core import calcular_trabajado
+from procesador.core import MergedIntervals, calcular_trabajado, calcular_trabajado_batch
 
 def _cfg():
     cfg = AppConfig()
@@ -54,3 +54,54 @@ def test_nolabor_overlap_with_comida_not_double_discounted():
     assert nolab_ov == 20
     assert nolab_intov == 0
     assert nolab_ign == 0
+
+
+def _m(t):
+    return -1 if t is None else t.hour * 60 + t.minute
+
+
+def test_batch_matches_per_day():
+    cfg = _cfg()
+    dias = [
+        ({"Entrada": time(22, 0), "Salida": time(6, 0)}, [(time(23, 30), time(0, 30), "A"), (time(0, 20), time(1, 0), "B")]),
+        ({"Entrada": time(8, 0), "Salida": time(18, 0), "Salida a comer": time(13, 0), "Regreso de comer": time(13, 50)}, [(time(13, 30), None, "C")]),
+        ({"Entrada": None, "Salida": time(18, 0)}, []),
+    ]
+    ent, sal, mid, offs, starts, ends = [], [], [], [0], [], []
+    keys = ("Salida a comer", "Regreso de comer", "Salida a cenar", "Regreso de cenar")
+    for ev, nl in dias:
+        ent.append(_m(ev.get("Entrada")))
+        sal.append(_m(ev.get("Salida")))
+        mid.append(tuple(_m(ev.get(k)) for k in keys))
+        for ini, fin, _ in nl:
+            starts.append(_m(ini))
+            ends.append(_m(fin if fin is not None else ev["Salida"]))
+        offs.append(len(starts))
+    got = calcular_trabajado_batch(ent, sal, mid, offs, starts, ends, cfg)
+    assert got == [calcular_trabajado(ev, cfg, nl or None) for ev, nl in dias]
+
+
+def test_merged_intervals_matches_list_in_any_order():
+    cfg = _cfg()
+    eventos = {
+        "Entrada": time(22, 0),
+        "Salida": time(6, 0),
+        "Salida a cenar": time(0, 0),
+        "Regreso de cenar": time(0, 40),
+    }
+    no_lab = [
+        (time(23, 30), time(0, 30), "A"),
+        (time(0, 20), time(1, 0), "B"),
+        (time(1, 0), time(1, 15), "C"),
+        (time(20, 0), time(21, 0), "fuera"),
+        (time(5, 30), None, "sin fin"),
+    ]
+    esperado = calcular_trabajado(eventos, cfg, no_lab)
+    for orden in (no_lab, no_lab[::-1], no_lab[2:] + no_lab[:2]):
+        mi = MergedIntervals(eventos["Entrada"], eventos["Salida"])
+        for ini, fin, _nota in orden:
+            mi.add(ini, fin)
+        assert calcular_trabajado(eventos, cfg, mi) == esperado
+    # Si la jornada cambió (p.ej. corrección de Salida), se recalcula desde los intervalos capturados
+    eventos2 = dict(eventos, Salida=time(5, 0))
+    assert calcular_trabajado(eventos2, cfg, mi) == calcular_trabajado(eventos2, cfg, no_lab)
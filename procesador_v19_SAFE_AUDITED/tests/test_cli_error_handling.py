@@ -81,3 +81,32 @@ def test_cmd_verify_audit_missing_bundle(monkeypatch, tmp_path):
     args = _make_verify_args(bundle_path=str(bundle))
     rc = cli._cmd_verify_audit(args)
     assert rc == 2
+
+
+def test_cli_import_is_lazy():
+    import subprocess
+    import sys
+
+    root = Path(__file__).resolve().parents[1]
+    code = "import sys, procesador.cli; print('pandas' in sys.modules)"
+    out = subprocess.run([sys.executable, "-c", code], cwd=root, capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == "False"
+
+
+def test_cmd_verify_audit_rejects_bundle_outside_audit_dir(monkeypatch, tmp_path):
+    import json
+
+    from procesador import cli
+
+    def _fail_verificar(*args, **kwargs):
+        raise AssertionError("should not verify an escaping bundle")
+
+    monkeypatch.setattr(cli, "verificar_auditoria_bundle", _fail_verificar)
+
+    audit_dir = tmp_path / "auditoria"
+    audit_dir.mkdir()
+    (tmp_path / "fuera.json").write_text("{}", encoding="utf-8")
+    for name in ("../fuera.json", ".", str(tmp_path / "fuera.json")):
+        (audit_dir / "latest.json").write_text(json.dumps({"bundle": name}), encoding="utf-8")
+        rc = cli._cmd_verify_audit(_make_verify_args(latest_dir=str(tmp_path)))
+        assert rc == 2
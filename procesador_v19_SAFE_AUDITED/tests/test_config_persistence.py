@@ -30,3 +30,26 @@ def test_config_no_backup_when_unchanged(tmp_path: Path):
     after = list(tmp_path.glob("mapa_grupos.json.bak_*") )
 
     assert len(after) == len(before)
+
+
+def test_column_width_exact_pattern_and_unknown():
+    cfg = AppConfig()
+    assert cfg.column_width("Nombre") == 32.0
+    assert cfg.column_width("Lun 05/01 Entrada") == 20.0
+    assert cfg.column_width("Columna desconocida") is None
+    cfg.column_width_patterns = [{"pattern": "([", "width": 9}, {"pattern": "^X", "width": 7}]
+    assert cfg.column_width("X1") == 7.0
+
+
+def test_empleados_snapshot_merges_maps():
+    cfg = AppConfig()
+    cfg.empleado_a_grupo = {"001": "FT"}
+    cfg.empleado_a_idgrupo = {"001": "FT-01", "002": "PT-02"}
+    cfg.empleado_status = {"002": {"activo": False, "fecha_baja": "2026-01-31"}}
+    cfg.empleado_meta = {"003": {"nombre": "Tres"}}
+
+    emps = cfg.empleados()
+    assert set(emps) == {"001", "002", "003"}
+    assert (emps["001"].grupo, emps["001"].idgrupo, emps["001"].activo) == ("FT", "FT-01", True)
+    assert emps["002"].activo is False and emps["002"].fecha_baja == "2026-01-31"
+    assert emps["003"].meta == {"nombre": "Tres"}
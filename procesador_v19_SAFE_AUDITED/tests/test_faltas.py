@@ -0,0 +1,51 @@
+from datetime import date
+
+import pandas as pd
+
+from procesador.config import AppConfig
+from procesador.faltas import calcular_faltas
+from procesador.utils import _month_key, _week_key, _week_month_keys
+
+
+def test_week_month_keys_vectorizado_igual_a_escalar():
+    idx = pd.date_range("2025-12-20", "2026-03-10")
+    for dow in (0, 2, 6, None):
+        cfg = AppConfig()
+        cfg.week_start_dow = dow
+        sem, mes = _week_month_keys(idx, cfg)
+        assert list(sem) == [_week_key(t, cfg) for t in idx]
+        assert list(mes) == [_month_key(t) for t in idx]
+
+
+def test_calcular_faltas_respeta_alta_baja_y_presentes():
+    cfg = AppConfig()
+    cfg.week_start_dow = 0  # semana lunes..domingo
+    df_out = pd.DataFrame({"ID": ["1", "2", "1"], "Fecha": ["2026-01-05", "2026-01-05", "2026-01-06"], "Nombre": ["Ana", "Beto", "Ana"]})
+    plantilla = pd.DataFrame({
+        "ID": ["001", "002", "003"],
+        "Nombre": ["", "", "Caro"],
+        "_activo": [True, True, False],
+        "FechaAlta": [pd.NaT, pd.NaT, pd.NaT],
+        "FechaBaja": [pd.NaT, date(2026, 1, 6), pd.NaT],
+    })
+    df_sem, df_mes, df_det = calcular_faltas(df_out, plantilla, cfg)
+    por_id = df_det.groupby("ID")["Fecha"].apply(list).to_dict()
+    # 001: semana 5..11 menos 5 y 6; 002: solo hasta su baja (6), presente el 5; 003 inactivo
+    assert por_id == {"001": [date(2026, 1, d) for d in range(7, 12)], "002": [date(2026, 1, 6)]}
+    assert set(df_det["Nombre"]) == {"Ana", "Beto"}
+    assert df_sem["Faltas"].sum() == df_mes["Faltas"].sum() == len(df_det) == 6
+
+
+def test_plantilla_excel_solo_columnas_reconocidas_y_relee_si_cambia(tmp_path):
+    from procesador.faltas import cargar_plantilla_empleados
+
+    p = tmp_path / "plantilla_empleados.xlsx"
+    pd.DataFrame({"﻿ID": ["1", "2"], "Nombre": ["Ana", "Beto"], "Notas": ["x", "y"]}).to_excel(p, index=False)
+    df = cargar_plantilla_empleados(tmp_path)
+    assert list(df["ID"]) == ["001", "002"] and "Notas" not in df.columns
+    df.loc[0, "Nombre"] = "mutado"  # la copia devuelta no contamina la siguiente lectura
+    assert list(cargar_plantilla_empleados(tmp_path)["Nombre"]) == ["Ana", "Beto"]
+
+    pd.DataFrame({"ID": ["3"], "Activo": ["NO"]}).to_excel(p, index=False)
+    df = cargar_plantilla_empleados(tmp_path)
+    assert list(df["ID"]) == ["003"] and list(df["_activo"]) == [False]
@@ -1,4 +1,6 @@
-from procesador.groups import build_idgrupo_label
+import pandas as pd
+
+from procesador.groups import aplicar_grupos_y_idgrupo, apply_id_display, build_idgrupo_label, transform_sheet_idgrupo
 from procesador.config import AppConfig
 
 
@@ -14,3 +16,35 @@ def test_build_idgrupo_label_padding():
 def test_build_idgrupo_label_empty_code():
     cfg = AppConfig()
     assert build_idgrupo_label("", 3, cfg) == ""
+
+
+def test_aplicar_grupos_actualiza_meta_y_status_por_id():
+    cfg = AppConfig()
+    cfg.empleado_meta = {"003": {"nombre": "Previo"}}
+    df = pd.DataFrame({
+        "ID": ["001", " 001", "002", "003", "NOMBRE::ana", None],
+        "Nombre": ["", "Ana", None, "Otro", "ana", "Sin ID"],
+    })
+    aplicar_grupos_y_idgrupo(df, {"id": "ID", "nombre": "Nombre"}, cfg, permitir_interactivo=False)
+    assert cfg.empleado_meta["001"] == {"nombre": "Ana"}
+    assert cfg.empleado_meta["003"] == {"nombre": "Previo"}
+    assert "002" not in cfg.empleado_meta  # sin nombre en la hoja
+    assert cfg.empleado_status == {k: {"activo": True} for k in ("001", "002", "003")}
+
+
+def test_transform_sheet_idgrupo_labels_repeated_ids():
+    cfg = AppConfig()
+    cfg.idgrupo_emp_min_width = 2
+    codes = {"3": "000", "115": "F"}
+    df = pd.DataFrame({"ID": ["3", "115", "3", None, "9"], "Horas": [1, 2, 3, 4, 5]})
+    out = transform_sheet_idgrupo(df, cfg, lambda x: codes.get(str(x), ""))
+    assert list(out.columns) == ["IDGRUPO", "Horas"]
+    assert out["IDGRUPO"].tolist() == ["000-03", "F-115", "000-03", "", ""]
+
+
+def test_apply_id_display_blanks_nombre_keys_without_touching_input():
+    df = pd.DataFrame({"ID": ["001", "NOMBRE::ana", "002"], "Horas": [1, 2, 3]})
+    out = apply_id_display(df)
+    assert out["ID"].tolist() == ["001", "", "002"]
+    assert df["ID"].tolist() == ["001", "NOMBRE::ana", "002"]
+    assert apply_id_display(df.drop(columns=["ID"])) is not None
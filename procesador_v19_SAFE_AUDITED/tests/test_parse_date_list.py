@@ -0,0 +1,14 @@
+from datetime import date
+
+from procesador.corrections import _parse_date_list
+
+
+def test_parse_date_list_rango_inclusivo_y_mezcla():
+    out = _parse_date_list("2026-01-30..2026-02-02, 2026-03-01")
+    assert out == [date(2026, 1, 30), date(2026, 1, 31), date(2026, 2, 1), date(2026, 2, 2), date(2026, 3, 1)]
+
+
+def test_parse_date_list_rango_invertido_y_duplicados():
+    out = _parse_date_list("2024-03-01..2024-02-28,2024-02-29,basura")
+    assert out == [date(2024, 2, 28), date(2024, 2, 29), date(2024, 3, 1)]
+    assert _parse_date_list("") == []
@@ -45,3 +45,27 @@ def test_interactive_bulk_plan(monkeypatch):
     assert bulk_plan["dates"] == ["2026-01-29", "2026-01-30"]
     assert isinstance(no_labor, list)
     assert len(audit_log) >= 2
+
+
+def test_interactive_recalcula_solo_si_cambian_checadas(monkeypatch):
+    import procesador.corrections as corr
+
+    inputs = iter(["4", "99", "2", "12:00", "", "m", "4", "0"])
+    monkeypatch.setattr("builtins.input", lambda _prompt="": next(inputs))
+    calls = []
+    orig = corr._recalc_preview
+    monkeypatch.setattr(corr, "_recalc_preview", lambda *a, **k: calls.append(1) or orig(*a, **k))
+
+    times, _nota, _bulk, _nl = editar_checadas_interactivo(
+        run_id="RUN",
+        emp_id="115",
+        nombre="Empleado",
+        fecha_d=date(2026, 1, 28),
+        registro_raw="09:00 18:00",
+        cfg=AppConfig(),
+        usuario="TEST",
+        audit_log=[],
+    )
+    assert times is None
+    # 5 redibujos, pero solo el estado inicial y el posterior a insertar se calculan
+    assert len(calls) == 2